@@ -11,11 +11,16 @@ Server agents authenticate using cluster's public/private key pair.
 import logging
 from datetime import datetime, timezone
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError as PydanticValidationError
 
-from app.core.crypto import canonicalize_heartbeat_envelope, verify_ed25519_signature
+from app.core.crypto import (
+    canonicalize_heartbeat_envelope,
+    is_ed25519_signature_b64,
+    verify_ed25519_signature,
+)
 from app.core.errors import (
     KeyVersionMismatchError,
     NotFoundError,
@@ -77,7 +82,7 @@ async def ingest_heartbeat(
     """
     # 0. Parse body and audit contract violations (DROP_ON_VIOLATION: unknown_field, malformed_payload)
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except Exception:
         await rejections_repo.record_rejection(
             None,
@@ -187,9 +192,13 @@ async def ingest_heartbeat(
     }
     canonical_message = canonicalize_heartbeat_envelope(envelope)
 
-    signature_valid = verify_ed25519_signature(
-        public_key_ed25519, canonical_message, heartbeat.signature
-    )
+    # Malformed signatures are rejected without crypto
+    if is_ed25519_signature_b64(heartbeat.signature):
+        signature_valid = verify_ed25519_signature(
+            public_key_ed25519, canonical_message, heartbeat.signature
+        )
+    else:
+        signature_valid = False
 
     if not signature_valid:
         await rejections_repo.record_rejection(
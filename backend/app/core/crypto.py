@@ -4,17 +4,25 @@ Cryptographic utilities for agent signature verification.
 Ed25519 signature verification for heartbeat authentication.
 """
 
-import base64
-import json
+import binascii
 import logging
+import re
 from datetime import datetime, timezone
+from functools import lru_cache
 
+import orjson
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives.asymmetric.ed25519 import (
     Ed25519PrivateKey,
     Ed25519PublicKey,
 )
 
+try:
+    import pybase64 as base64  # type: ignore  # SIMD base64, drop-in for the stdlib API
+except ImportError:
+    # pybase64 not installed, use stdlib base64
+    import base64
+
 logger = logging.getLogger(__name__)
 
 # Whitelist of signed fields (schema freeze - unknown fields are ignored)
@@ -30,6 +38,35 @@ _SIGNED_FIELD_WHITELIST = {
     "agent_version",
 }
 
+# Signed fields in canonical (alphabetical) order, so the encoder needn't sort
+_SIGNED_FIELDS_SORTED = tuple(sorted(_SIGNED_FIELD_WHITELIST))
+
+# Every field an envelope may carry (signed fields plus excluded signature/payload)
+_KNOWN_ENVELOPE_FIELDS = frozenset(_SIGNED_FIELD_WHITELIST | {"signature", "payload"})
+
+# Timestamp strings already in canonical form (normalizing them is a no-op)
+_CANONICAL_TIMESTAMP_RE = re.compile(r"[1-9]\d{3}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+
+# Base64 of a 64-byte Ed25519 signature: exactly 86 alphabet chars plus "==" padding
+_ED25519_SIGNATURE_B64_RE = re.compile(r"[A-Za-z0-9+/]{86}==")
+
+
+def iso_z(dt: datetime) -> str:
+    """
+    Format a datetime as exact RFC3339 UTC with Z suffix (second precision).
+
+    Naive datetimes are assumed to be UTC; aware ones are converted to UTC.
+    Writes the Z directly instead of post-processing isoformat()'s "+00:00".
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif dt.tzinfo is not timezone.utc:
+        dt = dt.astimezone(timezone.utc)
+    if dt.year >= 1000:
+        # isoformat is cheaper than strftime; identical output for 4-digit years
+        return dt.isoformat(timespec="seconds")[:19] + "Z"
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
 
 def canonicalize_heartbeat_envelope(envelope: dict) -> bytes:
     """
@@ -65,9 +102,7 @@ def canonicalize_heartbeat_envelope(envelope: dict) -> bytes:
         UTF-8 bytes for signing
     """
     # Check for unknown fields (log once per agent_version for debugging)
-    unknown_fields = (
-        set(envelope.keys()) - _SIGNED_FIELD_WHITELIST - {"signature", "payload"}
-    )
+    unknown_fields = envelope.keys() - _KNOWN_ENVELOPE_FIELDS
     if unknown_fields:
         agent_version = envelope.get("agent_version", "unknown")
         logger.warning(
@@ -78,27 +113,16 @@ def canonicalize_heartbeat_envelope(envelope: dict) -> bytes:
             },
         )
 
-    # Extract only whitelisted signed fields
-    signed_fields = {field: envelope.get(field) for field in _SIGNED_FIELD_WHITELIST}
+    # Extract only whitelisted signed fields, already in sorted key order
+    signed_fields = {field: envelope.get(field) for field in _SIGNED_FIELDS_SORTED}
 
     # Normalize timestamp to exact RFC3339 UTC with Z suffix
     if signed_fields["timestamp"]:
         if isinstance(signed_fields["timestamp"], datetime):
-            # Ensure UTC and format as RFC3339 with Z (exact format)
-            if signed_fields["timestamp"].tzinfo is None:
-                signed_fields["timestamp"] = signed_fields["timestamp"].replace(
-                    tzinfo=timezone.utc
-                )
-            # Convert to UTC if not already
-            if signed_fields["timestamp"].tzinfo != timezone.utc:
-                signed_fields["timestamp"] = signed_fields["timestamp"].astimezone(
-                    timezone.utc
-                )
-            # Format as RFC3339 with Z (no milliseconds for consistency)
-            signed_fields["timestamp"] = signed_fields["timestamp"].strftime(
-                "%Y-%m-%dT%H:%M:%SZ"
-            )
-        elif isinstance(signed_fields["timestamp"], str):
+            signed_fields["timestamp"] = iso_z(signed_fields["timestamp"])
+        elif isinstance(signed_fields["timestamp"], str) and not _CANONICAL_TIMESTAMP_RE.fullmatch(
+            signed_fields["timestamp"]
+        ):
             # Normalize string timestamps to exact RFC3339 UTC with Z
             ts_str = signed_fields["timestamp"]
             # Parse and normalize to UTC Z (handles all timezone formats)
@@ -106,16 +130,8 @@ def canonicalize_heartbeat_envelope(envelope: dict) -> bytes:
                 # Handle Z suffix
                 if ts_str.endswith("Z"):
                     ts_str = ts_str.replace("Z", "+00:00")
-                # Parse ISO format
-                dt = datetime.fromisoformat(ts_str)
-                # Convert to UTC if timezone-aware
-                if dt.tzinfo:
-                    dt = dt.astimezone(timezone.utc)
-                else:
-                    # Assume UTC if no timezone info
-                    dt = dt.replace(tzinfo=timezone.utc)
-                # Format as exact RFC3339 UTC with Z (no milliseconds)
-                signed_fields["timestamp"] = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+                # Parse ISO format (naive timestamps are assumed UTC by iso_z)
+                signed_fields["timestamp"] = iso_z(datetime.fromisoformat(ts_str))
             except (ValueError, AttributeError):
                 # If parsing fails, try simple replacement as fallback
                 ts_str = ts_str.replace("+00:00", "Z").replace("-00:00", "Z")
@@ -123,16 +139,34 @@ def canonicalize_heartbeat_envelope(envelope: dict) -> bytes:
                     ts_str = ts_str + "Z"
                 signed_fields["timestamp"] = ts_str
 
-    # Create deterministic JSON (sorted keys, no whitespace)
-    # Use separators=(',', ':') to ensure no whitespace
-    canonical_json = json.dumps(
-        signed_fields,
-        sort_keys=True,
-        separators=(",", ":"),
-        ensure_ascii=False,
+    # Create deterministic JSON (sorted keys, no whitespace, UTF-8 not \u-escaped).
+    # orjson output is compact and byte-identical to
+    # json.dumps(sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return orjson.dumps(signed_fields)
+
+
+def is_ed25519_signature_b64(signature_b64: str) -> bool:
+    """
+    Cheap shape check for a base64-encoded Ed25519 signature.
+
+    Lets callers reject malformed signatures before any base64 decoding or
+    curve arithmetic. Passing this check says nothing about validity.
+    """
+    return (
+        len(signature_b64) == 88
+        and _ED25519_SIGNATURE_B64_RE.fullmatch(signature_b64) is not None
     )
 
-    return canonical_json.encode("utf-8")
+
+@lru_cache(maxsize=4096)
+def _load_public_key(public_key_b64: str) -> Ed25519PublicKey:
+    """
+    Decode and parse a base64 Ed25519 public key, cached per key.
+
+    Each cluster signs with one key (per key_version), so repeated heartbeats
+    reuse the parsed key object. Invalid keys raise and are not cached.
+    """
+    return Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_b64))
 
 
 def verify_ed25519_signature(
@@ -150,21 +184,18 @@ def verify_ed25519_signature(
         True if signature is valid, False otherwise
     """
     try:
-        # Decode base64 public key
-        public_key_bytes = base64.b64decode(public_key_b64)
+        # Decode base64 public key and create key object (cached per key)
+        public_key = _load_public_key(public_key_b64)
 
         # Decode base64 signature
         signature_bytes = base64.b64decode(signature_b64)
 
-        # Create Ed25519 public key object
-        public_key = Ed25519PublicKey.from_public_bytes(public_key_bytes)
-
         # Verify signature
         public_key.verify(signature_bytes, message)
 
         return True
 
-    except (InvalidSignature, ValueError, base64.binascii.Error):
+    except (InvalidSignature, ValueError, binascii.Error):
         # Invalid signature, malformed base64, or wrong key format
         return False
     except Exception:
@@ -99,7 +99,9 @@ def get_directory_repo() -> DirectoryRepository:
         )
 
 
-# Heartbeat and ingest rejections repository instances (stateless, safe to share)
+# Heartbeat and ingest rejections repository instances (stateless, safe to share).
+# Their providers are async so FastAPI awaits them on the event loop instead of
+# dispatching each heartbeat request's dependencies through the threadpool.
 _heartbeat_repo: HeartbeatRepository | None = None
 _heartbeat_jobs_repo: HeartbeatJobsRepository | None = None
 _servers_derived_repo: ServersDerivedRepository | None = None
@@ -107,7 +109,7 @@ _ingest_rejections_repo: IngestRejectionsRepository | None = None
 _observed_repo: ObservedRepository | None = None
 
 
-def get_heartbeat_repo() -> HeartbeatRepository:
+async def get_heartbeat_repo() -> HeartbeatRepository:
     """
     Heartbeat repository provider.
 
@@ -119,7 +121,7 @@ def get_heartbeat_repo() -> HeartbeatRepository:
     return _heartbeat_repo
 
 
-def get_heartbeat_jobs_repo() -> HeartbeatJobsRepository:
+async def get_heartbeat_jobs_repo() -> HeartbeatJobsRepository:
     """
     Heartbeat jobs repository provider.
 
@@ -131,7 +133,7 @@ def get_heartbeat_jobs_repo() -> HeartbeatJobsRepository:
     return _heartbeat_jobs_repo
 
 
-def get_servers_derived_repo() -> ServersDerivedRepository:
+async def get_servers_derived_repo() -> ServersDerivedRepository:
     """
     Servers derived state repository provider.
 
@@ -143,7 +145,7 @@ def get_servers_derived_repo() -> ServersDerivedRepository:
     return _servers_derived_repo
 
 
-def get_ingest_rejections_repo() -> IngestRejectionsRepository:
+async def get_ingest_rejections_repo() -> IngestRejectionsRepository:
     """
     Ingest rejections repository provider.
 
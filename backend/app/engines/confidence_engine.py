@@ -17,9 +17,20 @@ from datetime import datetime, timezone
 from typing import Literal
 
 from app.db.servers_derived_repo import Heartbeat
+from app.engines.heartbeat_ages import heartbeat_ages_seconds
 
 logger = logging.getLogger(__name__)
 
+# Indexed by level: 0 = red, 1 = yellow, 2 = green
+_CONFIDENCE_LEVELS: tuple[Literal["red", "yellow", "green"], ...] = (
+    "red",
+    "yellow",
+    "green",
+)
+
+# Minimum heartbeats required for green (sustained signal)
+_MIN_GREEN_SAMPLES = 3
+
 
 def compute_confidence(
     server_id: str,
@@ -73,64 +84,63 @@ def compute_confidence(
         # Downgrade rule: Any state → red if all heartbeats removed
         return "red"
 
-    # Get most recent heartbeat (deterministic: heartbeats ordered by received_at DESC)
-    # Stability: Uses received_at (server-trusted clock), not agent timestamp
-    latest_heartbeat = heartbeats[0]
-    latest_received_at = latest_heartbeat["received_at"]
-
-    # Check time since latest heartbeat (based on received_at for stability)
+    # Ages relative to a single now (based on received_at for stability)
     now = datetime.now(timezone.utc)
-    time_since_latest = (now - latest_received_at).total_seconds()
-
-    # Red: stale beyond 2*grace (downgrade rule: any state → red if stale)
-    # This is the most severe downgrade (stale signal)
-    if time_since_latest > (2 * grace_window_seconds):
-        reason = "stale"
-        logger.debug(
-            f"Confidence: red ({reason})",
-            extra={
-                "server_id": server_id,
-                "time_since_latest": time_since_latest,
-                "grace_window": grace_window_seconds,
-            },
-        )
+    ages_s = heartbeat_ages_seconds(heartbeats, now)
+    return confidence_from_ages(server_id, ages_s, grace_window_seconds)
+
+
+def confidence_from_ages(
+    server_id: str,
+    ages_s: list[float],
+    grace_window_seconds: int,
+) -> Literal["green", "yellow", "red"]:
+    """
+    Classify confidence from precomputed heartbeat ages.
+
+    Args:
+        server_id: Server UUID (for logging/debugging)
+        ages_s: Heartbeat ages in seconds, most recent first (see compute_confidence)
+        grace_window_seconds: Grace window in seconds
+
+    Returns:
+        Confidence level: "green", "yellow", or "red"
+    """
+    if not ages_s:
         return "red"
 
-    # Check sample count (need at least 3 heartbeats for green)
-    # Downgrade rule: green → yellow if sample_count drops below 3
-    sample_count = len(heartbeats)
-    if sample_count < 3:
-        # Insufficient samples → yellow (new/intermittent)
-        # Prevents sudden jumps: cannot be green without sustained signal (≥3 samples)
-        reason = "insufficient_samples"
-        logger.debug(
-            f"Confidence: yellow ({reason})",
-            extra={"server_id": server_id, "sample_count": sample_count},
-        )
-        return "yellow"
-
-    # Check if within grace window
-    if time_since_latest <= grace_window_seconds:
-        # Within grace + enough samples (≥3) → green (consistent)
-        # Upgrade rule: yellow → green if time_since_latest ≤ grace AND sample_count ≥ 3
-        # No sudden jumps: requires both conditions (sustained signal)
-        reason = "consistent"
-        logger.debug(
-            f"Confidence: green ({reason})",
-            extra={"server_id": server_id, "sample_count": sample_count},
-        )
-        return "green"
-    else:
-        # Within 2*grace but beyond grace → yellow (intermittent)
-        # Downgrade rule: green → yellow if time_since_latest exceeds grace (but ≤ 2*grace)
-        # This is the intermediate state (prevents sudden red → green jumps)
-        reason = "intermittent"
-        logger.debug(
-            f"Confidence: yellow ({reason})",
-            extra={
-                "server_id": server_id,
-                "time_since_latest": time_since_latest,
-                "grace_window": grace_window_seconds,
-            },
-        )
-        return "yellow"
+    # Most recent heartbeat (deterministic: heartbeats ordered by received_at DESC)
+    # Stability: Uses received_at (server-trusted clock), not agent timestamp
+    time_since_latest = ages_s[0]
+    sample_count = len(ages_s)
+
+    # Level index into _CONFIDENCE_LEVELS (no if/else chain):
+    # - 0 (red): stale beyond 2*grace (downgrade rule: any state → red if stale)
+    # - 1 (yellow): < 3 samples, or within 2*grace but beyond grace (intermittent)
+    # - 2 (green): within grace AND ≥ 3 samples (sustained signal, no sudden jumps)
+    not_stale = time_since_latest <= 2 * grace_window_seconds
+    consistent = sample_count >= _MIN_GREEN_SAMPLES and time_since_latest <= grace_window_seconds
+    level = int(not_stale) * (1 + int(consistent))
+    confidence = _CONFIDENCE_LEVELS[level]
+
+    logger.debug(
+        f"Confidence: {confidence} ({_confidence_reason(level, sample_count)})",
+        extra={
+            "server_id": server_id,
+            "sample_count": sample_count,
+            "time_since_latest": time_since_latest,
+            "grace_window": grace_window_seconds,
+        },
+    )
+    return confidence
+
+
+def _confidence_reason(level: int, sample_count: int) -> str:
+    """Human-readable reason for a confidence level (debug logging only)."""
+    if level == 0:
+        return "stale"
+    if level == 2:
+        return "consistent"
+    if sample_count < _MIN_GREEN_SAMPLES:
+        return "insufficient_samples"
+    return "intermittent"
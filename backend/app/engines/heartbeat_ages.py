@@ -0,0 +1,30 @@
+"""
+Heartbeat age helpers.
+
+Converts heartbeat received_at timestamps into ages (seconds before a reference
+"now") once, so engines that share a heartbeat list don't each redo the
+datetime arithmetic. Engine interiors work on these plain floats only.
+"""
+
+from datetime import datetime
+
+from app.db.servers_derived_repo import Heartbeat
+
+
+def heartbeat_ages_seconds(heartbeats: list[Heartbeat], now: datetime) -> list[float]:
+    """
+    Compute age in seconds of each heartbeat relative to now.
+
+    Order is preserved: heartbeats ordered by received_at DESC yield ages
+    in ascending order (most recent first).
+
+    Args:
+        heartbeats: List of heartbeats (received_at is server-trusted clock)
+        now: Reference time (UTC)
+
+    Returns:
+        List of ages in seconds, one per heartbeat
+    """
+    # Epoch-seconds floats: one subtraction per heartbeat, no timedelta objects
+    now_ts = now.timestamp()
+    return [now_ts - hb["received_at"].timestamp() for hb in heartbeats]
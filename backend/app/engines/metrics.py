@@ -0,0 +1,59 @@
+"""
+Combined metrics.
+
+Computes uptime, confidence, and quality for one server from a single pass
+over heartbeat ages, for callers (the heartbeat worker) that need all three.
+"""
+
+from datetime import datetime, timezone
+from typing import Literal
+
+from app.db.servers_derived_repo import Heartbeat
+from app.engines.confidence_engine import confidence_from_ages
+from app.engines.heartbeat_ages import heartbeat_ages_seconds
+from app.engines.quality_engine import compute_quality_score
+from app.engines.uptime_engine import uptime_from_ages
+
+
+def compute_all(
+    server_id: str,
+    heartbeats: list[Heartbeat],
+    grace_window_seconds: int,
+    window_hours: int = 24,
+) -> tuple[float | None, Literal["green", "yellow", "red"], float | None]:
+    """
+    Compute uptime, confidence, and quality in one pass over heartbeat ages.
+
+    Equivalent to calling compute_uptime_percent, compute_confidence, and
+    compute_quality_score separately (players taken from the latest heartbeat),
+    but converts received_at to ages once and shares them.
+
+    Args:
+        server_id: Server UUID (for logging/debugging)
+        heartbeats: List of heartbeats ordered by received_at DESC (most recent first)
+        grace_window_seconds: Grace window in seconds
+        window_hours: Rolling uptime window in hours (default 24)
+
+    Returns:
+        Tuple of (uptime_percent, confidence, quality_score)
+    """
+    if not heartbeats:
+        return None, "red", None
+
+    now = datetime.now(timezone.utc)
+    ages_s = heartbeat_ages_seconds(heartbeats, now)
+
+    uptime = uptime_from_ages(ages_s, grace_window_seconds, window_hours)
+    confidence = confidence_from_ages(server_id, ages_s, grace_window_seconds)
+
+    latest = heartbeats[0]
+    quality = compute_quality_score(
+        uptime,
+        latest.get("players_current"),
+        latest.get("players_capacity"),
+        confidence,
+        heartbeats,
+    )
+
+    return uptime, confidence, quality
+
@@ -15,17 +15,30 @@ Invariants:
 - Stability: Same inputs → same output (pure function, no randomness)
 """
 
+from collections.abc import Sequence
 from typing import Literal
 
 from app.db.servers_derived_repo import Heartbeat
 
+# Weights (v1 simple)
+UPTIME_WEIGHT = 0.6  # 60% weight on uptime
+ACTIVITY_WEIGHT = 0.3  # 30% weight on player activity
+CONFIDENCE_BASE = 0.1  # 10% base from confidence
+
+# Confidence multipliers (monotonic: green > yellow > red)
+CONFIDENCE_MULTIPLIERS = {
+    "green": 1.0,  # Full confidence contribution
+    "yellow": 0.7,  # Reduced confidence contribution
+    "red": 0.3,  # Minimal confidence contribution
+}
+
 
 def compute_quality_score(
     uptime_percent: float | None,
     players_current: int | None,
     players_capacity: int | None,
     confidence: Literal["green", "yellow", "red"],
-    heartbeats: list[Heartbeat],
+    heartbeats: Sequence[Heartbeat],
 ) -> float | None:
     """
     Compute quality score (0-100).
@@ -51,7 +64,7 @@ def compute_quality_score(
         players_current: Current player count or None
         players_capacity: Player capacity or None
         confidence: Confidence level ("green", "yellow", "red")
-        heartbeats: List of heartbeats (not used in v1, reserved for future)
+        heartbeats: Heartbeats, any sequence (not used in v1, reserved for future)
 
     Returns:
         Quality score (0-100) or None if insufficient data (uptime_percent is None)
@@ -62,62 +75,53 @@ def compute_quality_score(
         - High uptime (95%), high activity (65/70), red confidence → ~70+
         - No uptime data → None
     """
-    # Weights (v1 simple)
-    UPTIME_WEIGHT = 0.6  # 60% weight on uptime
-    ACTIVITY_WEIGHT = 0.3  # 30% weight on player activity
-    CONFIDENCE_BASE = 0.1  # 10% base from confidence
-
-    # Confidence multipliers (monotonic: green > yellow > red)
-    CONFIDENCE_MULTIPLIERS = {
-        "green": 1.0,  # Full confidence contribution
-        "yellow": 0.7,  # Reduced confidence contribution
-        "red": 0.3,  # Minimal confidence contribution
-    }
-
     # Unknown behavior: If no uptime data, cannot compute quality
     # This is the primary data requirement - without uptime, quality is undefined
     if uptime_percent is None:
         return None
 
-    # Clamp uptime_percent to valid range [0, 100] (defensive programming)
-    # This ensures output is always in valid range even if caller passes invalid input
-    uptime_percent = max(0.0, min(100.0, uptime_percent))
-
-    # Compute uptime component (60% of score)
-    uptime_component = UPTIME_WEIGHT * uptime_percent
-
-    # Compute activity component (30% of score, normalized player fill rate)
+    # Normalized player fill rate [0, 1] for the activity component
     # Monotonic: higher fill rate → higher activity component
-    activity_component = 0.0
+    fill_rate = 0.0
     if (
         players_current is not None
         and players_capacity is not None
         and players_capacity > 0
     ):
-        # Normalize to fill rate [0, 1], then scale to [0, 30] (30% weight)
-        fill_rate = min(
-            1.0, max(0.0, players_current / players_capacity)
-        )  # Clamp to 0-1
-        activity_component = ACTIVITY_WEIGHT * (
-            fill_rate * 100.0
-        )  # Scale to 0-100, then apply weight
+        fill_rate = min(1.0, max(0.0, players_current / players_capacity))  # Clamp to 0-1
     elif players_current is not None and players_current > 0:
         # Have players but no capacity - use a default capacity estimate
         # Assume 70 is a reasonable default capacity (common server size)
         # This allows quality computation even when capacity is unknown
         fill_rate = min(1.0, max(0.0, players_current / 70.0))
-        activity_component = ACTIVITY_WEIGHT * (fill_rate * 100.0)
-    # If players_current is None or 0, activity_component remains 0.0 (no penalty, just no bonus)
+    # If players_current is None or 0, fill_rate remains 0.0 (no penalty, just no bonus)
 
-    # Compute confidence component (10% base, scaled by confidence multiplier)
     # Monotonic: green > yellow > red (ensures quality decreases as confidence degrades)
     confidence_multiplier = CONFIDENCE_MULTIPLIERS.get(
         confidence, 0.3
     )  # Default to red if unknown
-    confidence_component = CONFIDENCE_BASE * (confidence_multiplier * 100.0)
 
-    # Sum components (all components are non-negative, so sum is non-negative)
-    quality_score = uptime_component + activity_component + confidence_component
+    return _score_core(uptime_percent, fill_rate, confidence_multiplier)
+
+
+def _score_core(uptime_percent: float, fill_rate: float, confidence_multiplier: float) -> float:
+    """
+    Weighted quality sum on plain floats (no None handling), clamped to [0, 100].
+
+    Kept as a plain function: a scalar per-server call is cheaper interpreted
+    than through a JIT dispatcher.
+    """
+    # Clamp uptime_percent to valid range [0, 100] (defensive programming)
+    # This ensures output is always in valid range even if caller passes invalid input
+    uptime_percent = max(0.0, min(100.0, uptime_percent))
+
+    # Sum components (all components are non-negative, so sum is non-negative):
+    # uptime (60%), activity (30%, fill rate scaled to 0-100), confidence (10% base)
+    quality_score = (
+        UPTIME_WEIGHT * uptime_percent
+        + ACTIVITY_WEIGHT * (fill_rate * 100.0)
+        + CONFIDENCE_BASE * (confidence_multiplier * 100.0)
+    )
 
     # Clamp to 0-100 (invariant: output must always be in valid range)
     # This is defensive - theoretically sum should be ≤ 100, but clamp ensures it
@@ -19,7 +19,10 @@ from app.schemas.directory import ServerStatus
 
 
 def compute_effective_status(
-    server_id: str, heartbeats: list[Heartbeat], grace_window_seconds: int
+    server_id: str,
+    heartbeats: list[Heartbeat],
+    grace_window_seconds: int,
+    now: datetime | None = None,
 ) -> tuple[ServerStatus, datetime | None]:
     """
     Compute effective_status from heartbeat history.
@@ -45,6 +48,7 @@ def compute_effective_status(
         server_id: Server UUID (for logging/debugging)
         heartbeats: List of heartbeats ordered by received_at DESC (most recent first)
         grace_window_seconds: Grace window in seconds
+        now: Reference time (UTC); defaults to the current time
 
     Returns:
         Tuple of (effective_status, last_seen_at datetime or None)
@@ -67,7 +71,8 @@ def compute_effective_status(
     latest_received_at = latest_heartbeat["received_at"]
 
     # Check if latest heartbeat is within grace window
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
     time_since_latest = (now - latest_received_at).total_seconds()
 
     if time_since_latest <= grace_window_seconds:
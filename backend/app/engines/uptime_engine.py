@@ -12,17 +12,18 @@ Invariants:
 - Tie-break ordering: Deterministic interval merging (sorted by start time)
 """
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import NamedTuple
 
 from app.db.servers_derived_repo import Heartbeat
+from app.engines.heartbeat_ages import heartbeat_ages_seconds
 
 
 class TimeInterval(NamedTuple):
-    """Time interval for uptime calculation."""
+    """Time interval for uptime calculation (seconds since window start)."""
 
-    start: datetime
-    end: datetime
+    start: float
+    end: float
 
 
 def compute_uptime_percent(
@@ -30,6 +31,7 @@ def compute_uptime_percent(
     heartbeats: list[Heartbeat],
     grace_window_seconds: int,
     window_hours: int = 24,
+    now: datetime | None = None,
 ) -> float | None:
     """
     Compute uptime percentage over rolling window.
@@ -66,6 +68,7 @@ def compute_uptime_percent(
         heartbeats: List of heartbeats ordered by received_at DESC (most recent first)
         grace_window_seconds: Grace window in seconds (coverage per heartbeat)
         window_hours: Rolling window size in hours (default 24)
+        now: Window end (UTC); defaults to the current time
 
     Returns:
         Uptime percentage (0-100) or None if no heartbeats in window
@@ -78,29 +81,58 @@ def compute_uptime_percent(
     if not heartbeats:
         return None
 
-    # Calculate window boundaries (rolling window: now - window_hours to now)
+    # Ages relative to a single now (rolling window: now - window_hours to now)
     # Stability: Uses current time (now) for window end, ensuring deterministic calculation
-    now = datetime.now(timezone.utc)
-    window_start = now - timedelta(hours=window_hours)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    ages_s = heartbeat_ages_seconds(heartbeats, now)
+    return uptime_from_ages(ages_s, grace_window_seconds, window_hours)
 
-    # Filter heartbeats within window (based on received_at, server-trusted clock)
-    # Stability: received_at is deterministic (not agent-reported timestamp which may vary)
-    window_heartbeats = [hb for hb in heartbeats if hb["received_at"] >= window_start]
 
-    if not window_heartbeats:
+def uptime_from_ages(
+    ages_s: list[float],
+    grace_window_seconds: int,
+    window_hours: int = 24,
+) -> float | None:
+    """
+    Compute uptime percentage from precomputed heartbeat ages.
+
+    Works in seconds since window start so no datetime objects are built per
+    heartbeat. Same algorithm and edge cases as compute_uptime_percent.
+
+    Args:
+        ages_s: Heartbeat ages in seconds relative to now (any order)
+        grace_window_seconds: Grace window in seconds (coverage per heartbeat)
+        window_hours: Rolling window size in hours (default 24)
+
+    Returns:
+        Uptime percentage (0-100) or None if no heartbeats in window
+    """
+    window_seconds = window_hours * 3600.0
+
+    if window_seconds == 0:
         return None
 
-    # Create intervals: each heartbeat covers grace_window_seconds
-    # Each heartbeat represents "online" status for grace_window_seconds after received_at
+    if len(ages_s) == 1:
+        # Cold start: a single interval needs no sort or merge
+        return _uptime_from_single_age(ages_s[0], grace_window_seconds, window_seconds)
+
+    if grace_window_seconds > 0 and len(ages_s) > 2 * (window_seconds // grace_window_seconds + 1):
+        # Dense history: more heartbeats than grace-wide buckets can distinguish
+        ages_s = _bucket_extreme_ages(ages_s, grace_window_seconds, window_seconds)
+
+    # Create intervals: each heartbeat covers grace_window_seconds after received_at
+    # Filter heartbeats within window (received_at >= window_start ⇔ age <= window)
     intervals: list[TimeInterval] = []
-    for hb in window_heartbeats:
-        received_at = hb["received_at"]  # Server-trusted clock (stability guarantee)
-        interval_start = received_at
-        interval_end = received_at + timedelta(seconds=grace_window_seconds)
+    for age in ages_s:
+        if age > window_seconds:
+            continue
+        interval_start = window_seconds - age  # Offset from window start
+        interval_end = interval_start + grace_window_seconds
 
         # Clamp to window boundaries (no extrapolation beyond window)
-        interval_start = max(interval_start, window_start)
-        interval_end = min(interval_end, now)
+        interval_start = max(interval_start, 0.0)
+        interval_end = min(interval_end, window_seconds)
 
         # Only add valid intervals (start < end)
         if interval_start < interval_end:
@@ -113,38 +145,71 @@ def compute_uptime_percent(
     # Stability: Same intervals → same sorted order → same merged result
     intervals.sort(key=lambda x: x.start)
 
-    # Merge overlapping intervals (deterministic: sorted order ensures consistent merging)
-    merged: list[TimeInterval] = []
-    current = intervals[0]
+    # Merge overlapping intervals in one sweep (deterministic: sorted order ensures
+    # consistent merging), summing each merged interval as it closes
+    total_online_seconds = 0.0
+    current_start, current_end = intervals[0]
 
-    for interval in intervals[1:]:
-        if interval.start <= current.end:
+    for start, end in intervals[1:]:
+        if start <= current_end:
             # Overlapping - merge (extend current interval to cover both)
-            current = TimeInterval(current.start, max(current.end, interval.end))
+            if end > current_end:
+                current_end = end
         else:
-            # Non-overlapping - save current and start new
-            merged.append(current)
-            current = interval
-
-    merged.append(current)
-
-    # Calculate total online seconds (sum of all merged intervals)
-    total_online_seconds = sum(
-        (interval.end - interval.start).total_seconds() for interval in merged
-    )
-    total_online_minutes = total_online_seconds / 60.0
-
-    # Calculate total window minutes (window size)
-    total_window_minutes = (now - window_start).total_seconds() / 60.0
+            # Non-overlapping - count current and start new
+            total_online_seconds += current_end - current_start
+            current_start, current_end = start, end
 
-    if total_window_minutes == 0:
-        return None
+    total_online_seconds += current_end - current_start
 
     # Compute uptime percentage: (online_time / total_time) * 100
-    uptime_percent = (total_online_minutes / total_window_minutes) * 100.0
+    uptime_percent = (total_online_seconds / window_seconds) * 100.0
 
     # Clamp to 0-100 (invariant: output must always be in valid range)
     # Defensive programming: theoretically should be ≤ 100, but clamp ensures it
     uptime_percent = max(0.0, min(100.0, uptime_percent))
 
     return uptime_percent
+
+
+def _bucket_extreme_ages(
+    ages_s: list[float],
+    grace_window_seconds: int,
+    window_seconds: float,
+) -> list[float]:
+    """
+    Reduce in-window ages to the oldest and newest per grace-wide age bucket.
+
+    Lossless for uptime: heartbeats in one bucket are within grace of each other,
+    so their intervals union to [oldest, newest + grace) - exactly what the two
+    extremes cover. O(n) without sorting; at most two ages per bucket remain.
+    """
+    oldest: dict[int, float] = {}
+    newest: dict[int, float] = {}
+    for age in ages_s:
+        if not 0.0 <= age <= window_seconds:
+            continue  # Outside window (dropped by the merge anyway)
+        bucket = int(age // grace_window_seconds)
+        if bucket not in oldest:
+            oldest[bucket] = newest[bucket] = age
+        elif age > oldest[bucket]:
+            oldest[bucket] = age
+        elif age < newest[bucket]:
+            newest[bucket] = age
+    return [*oldest.values(), *newest.values()]
+
+
+def _uptime_from_single_age(
+    age: float,
+    grace_window_seconds: int,
+    window_seconds: float,
+) -> float | None:
+    """uptime_from_ages for exactly one heartbeat (same window and clamping)."""
+    if age > window_seconds:
+        return None
+    interval_start = max(window_seconds - age, 0.0)
+    interval_end = min(window_seconds - age + grace_window_seconds, window_seconds)
+    if not interval_start < interval_end:
+        return None
+    uptime_percent = ((interval_end - interval_start) / window_seconds) * 100.0
+    return max(0.0, min(100.0, uptime_percent))
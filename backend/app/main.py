@@ -11,6 +11,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.router import router as v1_router
 from app.core.config import get_settings
@@ -101,6 +102,7 @@ def create_app() -> FastAPI:
         docs_url="/docs" if settings.ENV != "production" else None,
         redoc_url="/redoc" if settings.ENV != "production" else None,
         lifespan=lifespan,  # Use lifespan handler instead of deprecated on_event
+        default_response_class=ORJSONResponse,  # orjson instead of stdlib json for responses
     )
 
     # CORS configuration
@@ -4,7 +4,7 @@ Server schemas.
 Pydantic models for server-related requests and responses.
 """
 
-from pydantic import model_validator
+from pydantic import field_validator, model_validator
 
 from app.schemas.base import BaseSchema
 from app.schemas.directory import DirectoryServer, HostingProvider, GameMode, Ruleset, ServerStatus
@@ -71,17 +71,18 @@ class ServerCreateRequest(BaseSchema):
             raise DomainValidationError("Vanilla and Vanilla QoL are mutually exclusive; choose one.")
         return self
 
-    @model_validator(mode="after")
-    def validate_hosting_provider(self) -> "ServerCreateRequest":
-        """Validate that only self_hosted servers can be created."""
-        if self.hosting_provider != "self_hosted":
+    @field_validator("hosting_provider")
+    @classmethod
+    def validate_hosting_provider(cls, v: HostingProvider) -> HostingProvider:
+        """Validate that only self_hosted servers can be created (runs only when provided)."""
+        if v != "self_hosted":
             from app.core.errors import DomainValidationError
 
             raise DomainValidationError(
                 f"ASASelfHosted lists self-hosted servers only. "
-                f"hosting_provider must be 'self_hosted', got '{self.hosting_provider}'"
+                f"hosting_provider must be 'self_hosted', got '{v}'"
             )
-        return self
+        return v
 
     @model_validator(mode="after")
     def validate_observation(self) -> "ServerCreateRequest":
@@ -153,18 +154,19 @@ class ServerUpdateRequest(BaseSchema):
             raise DomainValidationError("Vanilla and Vanilla QoL are mutually exclusive; choose one.")
         return self
 
-    @model_validator(mode="after")
-    def validate_hosting_provider(self) -> "ServerUpdateRequest":
+    @field_validator("hosting_provider")
+    @classmethod
+    def validate_hosting_provider(cls, v: HostingProvider | None) -> HostingProvider | None:
         """Validate that hosting_provider cannot be changed to non-self-hosted."""
-        if self.hosting_provider is not None and self.hosting_provider != "self_hosted":
+        if v is not None and v != "self_hosted":
             from app.core.errors import DomainValidationError
 
             raise DomainValidationError(
                 f"ASASelfHosted lists self-hosted servers only. "
-                f"Cannot change hosting_provider to '{self.hosting_provider}'. "
+                f"Cannot change hosting_provider to '{v}'. "
                 f"Must be 'self_hosted'."
             )
-        return self
+        return v
 
     @model_validator(mode="after")
     def validate_observation(self) -> "ServerUpdateRequest":
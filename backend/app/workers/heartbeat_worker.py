@@ -17,10 +17,8 @@ from app.db.providers import (
 )
 from app.db.servers_derived_repo import ServersDerivedRepository
 from app.engines.anomaly_engine import detect_player_spike_anomaly
-from app.engines.confidence_engine import compute_confidence
-from app.engines.quality_engine import compute_quality_score
+from app.engines.metrics import compute_all
 from app.engines.status_engine import compute_effective_status
-from app.engines.uptime_engine import compute_uptime_percent
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +38,9 @@ async def process_heartbeat_jobs(
         derived_repo: ServersDerivedRepository instance (injected or created)
     """
     if jobs_repo is None:
-        jobs_repo = get_heartbeat_jobs_repo()
+        jobs_repo = await get_heartbeat_jobs_repo()
     if derived_repo is None:
-        derived_repo = get_servers_derived_repo()
+        derived_repo = await get_servers_derived_repo()
 
     settings = get_settings()
 
@@ -118,35 +116,18 @@ async def process_heartbeat_jobs(
                         job["server_id"], heartbeats, grace_window
                     )
 
-                    confidence = compute_confidence(
-                        job["server_id"],
-                        heartbeats,
-                        grace_window,
-                        None,  # agent_version not used in v1
-                    )
-
-                    uptime = compute_uptime_percent(
+                    # Uptime, confidence, and quality share one pass over heartbeat ages
+                    uptime, confidence, quality = compute_all(
                         job["server_id"],
                         heartbeats,
                         grace_window,
                         window_hours=settings.HEARTBEAT_UPTIME_WINDOW_HOURS,
                     )
 
-                    # Get latest heartbeat for players data
-                    latest_players_current = None
-                    latest_players_capacity = None
-                    if heartbeats:
-                        latest = heartbeats[0]
-                        latest_players_current = latest.get("players_current")
-                        latest_players_capacity = latest.get("players_capacity")
-
-                    quality = compute_quality_score(
-                        uptime,
-                        latest_players_current,
-                        latest_players_capacity,
-                        confidence,
-                        heartbeats,
-                    )
+                    # Latest heartbeat players data (heartbeats is non-empty here)
+                    latest = heartbeats[0]
+                    latest_players_current = latest.get("players_current")
+                    latest_players_capacity = latest.get("players_capacity")
 
                     # Run anomaly detection engine (use deterministic now_utc)
                     now_utc = datetime.now(timezone.utc)
@@ -0,0 +1,117 @@
+"""
+Shared test fixtures.
+
+Tests get their own app instance (one per pytest-xdist worker process) and set
+dependency overrides through monkeypatch, so nothing leaks between tests and the
+suite can run with `pytest -n auto`.
+"""
+
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.crypto import canonicalize_heartbeat_envelope
+from app.db.servers_derived_repo import Heartbeat
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """Skip @pytest.mark.requires_supabase tests when Supabase isn't configured."""
+    if get_settings().SUPABASE_URL:
+        return
+    skip = pytest.mark.skip(reason="Supabase not configured (SUPABASE_URL unset)")
+    for item in items:
+        if "requires_supabase" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def app_instance() -> FastAPI:
+    """Fresh app for this test session (per xdist worker)."""
+    # Imported here so engine-only test modules don't depend on importing the app
+    from app.main import create_app
+
+    return create_app()
+
+
+@pytest.fixture(scope="session")
+def client(app_instance: FastAPI):
+    """
+    Shared TestClient for app_instance (one ASGI transport for the whole session).
+
+    The lifespan is not entered, matching per-test TestClient(app) usage, so the
+    heartbeat worker is never started during tests.
+    """
+    return TestClient(app_instance)
+
+
+@pytest.fixture
+def override_dependency(app_instance: FastAPI, monkeypatch: pytest.MonkeyPatch):
+    """Override a dependency on app_instance for the current test only."""
+
+    def _override(dependency, provider) -> None:
+        monkeypatch.setitem(app_instance.dependency_overrides, dependency, provider)
+
+    return _override
+
+
+@pytest.fixture(scope="module")
+def ed25519_key() -> tuple[Ed25519PrivateKey, str]:
+    """Ed25519 key pair shared by a test module: (private key, base64 public key)."""
+    priv = Ed25519PrivateKey.generate()
+    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+    return priv, pub_b64
+
+
+@pytest.fixture(scope="module")
+def sign(ed25519_key):
+    """Sign a heartbeat envelope's canonical form with ed25519_key (base64 signature)."""
+    priv, _ = ed25519_key
+
+    def _sign(envelope: dict) -> str:
+        return base64.b64encode(priv.sign(canonicalize_heartbeat_envelope(envelope))).decode(
+            "utf-8"
+        )
+
+    return _sign
+
+
+@pytest.fixture(scope="session")
+def now() -> datetime:
+    """Reference time (UTC), taken once per session; pass it to engines that accept now."""
+    return datetime.now(timezone.utc)
+
+
+# Heartbeat fields the engine tests leave empty
+_HB_DEFAULTS = {
+    "map_name": None,
+    "players_current": None,
+    "players_capacity": None,
+    "agent_version": None,
+    "key_version": None,
+}
+
+
+def _hb(
+    received_at: datetime,
+    status: str = "online",
+    server_id: str = "server-1",
+    idx: int | str = 0,
+) -> Heartbeat:
+    return {
+        "id": f"hb-{idx}",
+        "server_id": server_id,
+        "received_at": received_at,
+        "status": status,
+        **_HB_DEFAULTS,
+    }
+
+
+@pytest.fixture(scope="session")
+def make_heartbeat():
+    """Heartbeat factory (received_at, status, server_id, idx); other fields are None."""
+    return _hb
@@ -18,24 +18,12 @@ def test_compute_confidence_no_heartbeats():
     assert confidence == "red"
 
 
-def test_compute_confidence_stale_beyond_2x_grace():
+def test_compute_confidence_stale_beyond_2x_grace(make_heartbeat):
     """Test that stale beyond 2*grace returns red."""
     now = datetime.now(timezone.utc)
     stale_time = now - timedelta(seconds=1500)  # 25 minutes ago (beyond 2*600=1200s)
 
-    heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-1",
-            "received_at": stale_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-    ]
+    heartbeats: list[Heartbeat] = [make_heartbeat(stale_time, idx=1)]
 
     confidence = compute_confidence(
         "server-1", heartbeats, grace_window_seconds=600, agent_version=None
@@ -43,24 +31,13 @@ def test_compute_confidence_stale_beyond_2x_grace():
     assert confidence == "red"
 
 
-def test_compute_confidence_insufficient_samples():
+def test_compute_confidence_insufficient_samples(make_heartbeat):
     """Test that insufficient samples (< 3) returns yellow."""
     now = datetime.now(timezone.utc)
     recent_time = now - timedelta(seconds=300)  # 5 minutes ago (within grace)
 
     heartbeats: list[Heartbeat] = [
-        {
-            "id": f"hb-{i}",
-            "server_id": "server-1",
-            "received_at": recent_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-        for i in range(2)  # Only 2 heartbeats (< 3)
+        make_heartbeat(recent_time, idx=i) for i in range(2)  # Only 2 heartbeats (< 3)
     ]
 
     confidence = compute_confidence(
@@ -69,24 +46,13 @@ def test_compute_confidence_insufficient_samples():
     assert confidence == "yellow"
 
 
-def test_compute_confidence_green():
+def test_compute_confidence_green(make_heartbeat):
     """Test that within grace + enough samples returns green."""
     now = datetime.now(timezone.utc)
     recent_time = now - timedelta(seconds=300)  # 5 minutes ago (within grace)
 
     heartbeats: list[Heartbeat] = [
-        {
-            "id": f"hb-{i}",
-            "server_id": "server-1",
-            "received_at": recent_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-        for i in range(5)  # 5 heartbeats (>= 3)
+        make_heartbeat(recent_time, idx=i) for i in range(5)  # 5 heartbeats (>= 3)
     ]
 
     confidence = compute_confidence(
@@ -95,7 +61,7 @@ def test_compute_confidence_green():
     assert confidence == "green"
 
 
-def test_compute_confidence_yellow_within_2x_grace():
+def test_compute_confidence_yellow_within_2x_grace(make_heartbeat):
     """Test that within 2*grace but beyond grace returns yellow."""
     now = datetime.now(timezone.utc)
     intermediate_time = now - timedelta(
@@ -103,18 +69,7 @@ def test_compute_confidence_yellow_within_2x_grace():
     )  # 15 minutes ago (within 2*600=1200s, beyond 600s)
 
     heartbeats: list[Heartbeat] = [
-        {
-            "id": f"hb-{i}",
-            "server_id": "server-1",
-            "received_at": intermediate_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-        for i in range(5)  # Enough samples
+        make_heartbeat(intermediate_time, idx=i) for i in range(5)  # Enough samples
     ]
 
     confidence = compute_confidence(
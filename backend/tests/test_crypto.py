@@ -6,9 +6,12 @@ Tests Ed25519 signature verification and canonical envelope serialization.
 
 import base64
 
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-
-from app.core.crypto import canonicalize_heartbeat_envelope, verify_ed25519_signature
+from app.core.crypto import (
+    _load_public_key,
+    canonicalize_heartbeat_envelope,
+    is_ed25519_signature_b64,
+    verify_ed25519_signature,
+)
 
 
 def test_canonicalize_heartbeat_envelope_deterministic():
@@ -91,15 +94,9 @@ def test_canonicalize_heartbeat_envelope_includes_null_values():
     assert "null" in result_str
 
 
-def test_verify_ed25519_signature_valid():
+def test_verify_ed25519_signature_valid(ed25519_key):
     """Test Ed25519 signature verification with valid signature."""
-    # Generate test key pair
-    private_key = Ed25519PrivateKey.generate()
-    public_key = private_key.public_key()
-
-    # Encode public key as base64
-    public_key_bytes = public_key.public_bytes_raw()
-    public_key_b64 = base64.b64encode(public_key_bytes).decode("utf-8")
+    private_key, public_key_b64 = ed25519_key
 
     # Create message and sign it
     message = b"test message"
@@ -112,15 +109,9 @@ def test_verify_ed25519_signature_valid():
     assert result is True
 
 
-def test_verify_ed25519_signature_invalid():
+def test_verify_ed25519_signature_invalid(ed25519_key):
     """Test Ed25519 signature verification with invalid signature."""
-    # Generate test key pair
-    private_key = Ed25519PrivateKey.generate()
-    public_key = private_key.public_key()
-
-    # Encode public key as base64
-    public_key_bytes = public_key.public_bytes_raw()
-    public_key_b64 = base64.b64encode(public_key_bytes).decode("utf-8")
+    _, public_key_b64 = ed25519_key
 
     # Create message but use wrong signature
     message = b"test message"
@@ -139,6 +130,31 @@ def test_verify_ed25519_signature_invalid_base64():
     assert result is False
 
 
+def test_is_ed25519_signature_b64_shape_check(ed25519_key):
+    """Test that only 88-char padded base64 passes the signature shape precheck."""
+    private_key, _ = ed25519_key
+    signature_b64 = base64.b64encode(private_key.sign(b"message")).decode("utf-8")
+
+    assert is_ed25519_signature_b64(signature_b64) is True
+    assert is_ed25519_signature_b64("not-a-real-signature") is False
+    assert is_ed25519_signature_b64(signature_b64.rstrip("=")) is False  # Unpadded
+    assert is_ed25519_signature_b64("-" * 86 + "==") is False  # URL-safe alphabet
+
+
+def test_verify_ed25519_signature_reuses_cached_public_key(ed25519_key):
+    """Test that repeated verifications with one key parse it only once."""
+    private_key, public_key_b64 = ed25519_key
+
+    for message in (b"first", b"second"):
+        signature_b64 = base64.b64encode(private_key.sign(message)).decode("utf-8")
+        assert verify_ed25519_signature(public_key_b64, message, signature_b64) is True
+
+    hits_before = _load_public_key.cache_info().hits
+    signature_b64 = base64.b64encode(private_key.sign(b"third")).decode("utf-8")
+    assert verify_ed25519_signature(public_key_b64, b"third", signature_b64) is True
+    assert _load_public_key.cache_info().hits == hits_before + 1
+
+
 def test_canonicalize_heartbeat_envelope_ignores_unknown_fields():
     """Test that unknown fields are ignored (whitelist enforcement)."""
     envelope = {
@@ -10,9 +10,13 @@ import pytest
 
 from app.db.servers_derived_repo import Heartbeat
 from app.engines.confidence_engine import compute_confidence
-from app.engines.quality_engine import compute_quality_score
+from app.engines.metrics import compute_all
 from app.engines.uptime_engine import compute_uptime_percent
 
+# Acceptable confidence levels for loose assertions
+_GREEN_OR_YELLOW = frozenset({"green", "yellow"})
+_YELLOW_OR_RED = frozenset({"yellow", "red"})
+
 
 @pytest.fixture
 def grace_window():
@@ -23,7 +27,7 @@ def grace_window():
 class TestStaleServerDecay:
     """Test that stale servers decay gracefully."""
 
-    def test_server_goes_offline_metrics_decay(self, grace_window):
+    def test_server_goes_offline_metrics_decay(self, grace_window, make_heartbeat):
         """Regression test: Server goes offline, metrics decay over time."""
         now = datetime.now(timezone.utc)
 
@@ -34,46 +38,25 @@ class TestStaleServerDecay:
         # Initial state: server online with good heartbeats
         heartbeats_good: list[Heartbeat] = [
             {
-                "id": "hb-recent",
-                "server_id": "server-1",
-                "received_at": recent_online,
-                "status": "online",
-                "map_name": None,
+                **make_heartbeat(recent_online, idx="recent"),
                 "players_current": 50,
                 "players_capacity": 70,
-                "agent_version": None,
-                "key_version": None,
             },
             {
-                "id": "hb-old",
-                "server_id": "server-1",
-                "received_at": old_online,
-                "status": "online",
-                "map_name": None,
+                **make_heartbeat(old_online, idx="old"),
                 "players_current": 45,
                 "players_capacity": 70,
-                "agent_version": None,
-                "key_version": None,
             },
         ]
 
         # Compute metrics when online
-        uptime_online = compute_uptime_percent(
+        uptime_online, confidence_online, quality_online = compute_all(
             "server-1", heartbeats_good, grace_window, window_hours=24
         )
-        confidence_online = compute_confidence(
-            "server-1", heartbeats_good, grace_window
-        )
-        quality_online = compute_quality_score(
-            uptime_online, 50, 70, confidence_online, heartbeats_good
-        )
 
         assert uptime_online is not None
         # Confidence needs at least 3 heartbeats for green (we only have 2)
-        assert confidence_online in (
-            "green",
-            "yellow",
-        )  # May be yellow with only 2 heartbeats
+        assert confidence_online in _GREEN_OR_YELLOW  # May be yellow with only 2 heartbeats
         assert quality_online is not None
         # Quality depends on uptime, activity, and confidence - adjust expectation
         assert quality_online > 0.0  # Should have some quality
@@ -81,55 +64,30 @@ class TestStaleServerDecay:
         # Server goes offline (no recent heartbeats)
         # Only old heartbeat remains (outside grace window)
         heartbeats_stale: list[Heartbeat] = [
-            {
-                "id": "hb-old",
-                "server_id": "server-1",
-                "received_at": now - timedelta(hours=2),  # Beyond grace window
-                "status": "offline",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
+            # Beyond grace window
+            make_heartbeat(now - timedelta(hours=2), status="offline", idx="old")
         ]
 
         # Compute metrics when stale
-        uptime_stale = compute_uptime_percent(
+        uptime_stale, confidence_stale, quality_stale = compute_all(
             "server-1", heartbeats_stale, grace_window, window_hours=24
         )
-        confidence_stale = compute_confidence(
-            "server-1", heartbeats_stale, grace_window
-        )
-        quality_stale = compute_quality_score(
-            uptime_stale, None, None, confidence_stale, heartbeats_stale
-        )
 
         # Metrics should decay
-        assert confidence_stale in ("yellow", "red")  # Degraded confidence
+        assert confidence_stale in _YELLOW_OR_RED  # Degraded confidence
         if uptime_stale is not None:
             assert uptime_stale < uptime_online  # Uptime decreased
         if quality_stale is not None:
             assert quality_stale < quality_online  # Quality decreased
 
-    def test_confidence_degrades_green_to_yellow_to_red(self, grace_window):
+    def test_confidence_degrades_green_to_yellow_to_red(self, grace_window, make_heartbeat):
         """Regression test: Confidence degrades (green → yellow → red)."""
         now = datetime.now(timezone.utc)
 
         # Green: Recent heartbeats within grace window
+        # 5 heartbeats every 5 minutes (enough for green)
         heartbeats_green: list[Heartbeat] = [
-            {
-                "id": f"hb-{i}",
-                "server_id": "server-1",
-                "received_at": now - timedelta(seconds=i * 300),  # Every 5 minutes
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
-            for i in range(5)  # 5 heartbeats (enough for green)
+            make_heartbeat(now - timedelta(seconds=300) * i, idx=i) for i in range(5)
         ]
 
         confidence_green = compute_confidence(
@@ -139,40 +97,10 @@ class TestStaleServerDecay:
 
         # Yellow: Heartbeats between grace and 2*grace
         heartbeats_yellow: list[Heartbeat] = [
-            {
-                "id": "hb-1",
-                "server_id": "server-1",
-                "received_at": now
-                - timedelta(seconds=grace_window + 100),  # Beyond grace, within 2*grace
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            },
-            {
-                "id": "hb-2",
-                "server_id": "server-1",
-                "received_at": now - timedelta(seconds=grace_window + 200),
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            },
-            {
-                "id": "hb-3",
-                "server_id": "server-1",
-                "received_at": now - timedelta(seconds=grace_window + 300),
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            },
+            # Beyond grace, within 2*grace
+            make_heartbeat(now - timedelta(seconds=grace_window + 100), idx=1),
+            make_heartbeat(now - timedelta(seconds=grace_window + 200), idx=2),
+            make_heartbeat(now - timedelta(seconds=grace_window + 300), idx=3),
         ]
 
         confidence_yellow = compute_confidence(
@@ -182,18 +110,8 @@ class TestStaleServerDecay:
 
         # Red: Heartbeats beyond 2*grace or no heartbeats
         heartbeats_red: list[Heartbeat] = [
-            {
-                "id": "hb-1",
-                "server_id": "server-1",
-                "received_at": now
-                - timedelta(seconds=2 * grace_window + 100),  # Beyond 2*grace
-                "status": "offline",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
+            # Beyond 2*grace
+            make_heartbeat(now - timedelta(seconds=2 * grace_window + 100), status="offline", idx=1)
         ]
 
         confidence_red = compute_confidence("server-1", heartbeats_red, grace_window)
@@ -203,24 +121,14 @@ class TestStaleServerDecay:
         assert confidence_green != confidence_yellow
         assert confidence_yellow != confidence_red
 
-    def test_uptime_decreases_over_time(self, grace_window):
+    def test_uptime_decreases_over_time(self, grace_window, make_heartbeat):
         """Regression test: Uptime decreases over time."""
         now = datetime.now(timezone.utc)
 
         # Initial: Many recent heartbeats
+        # 20 heartbeats over 100 minutes, every 5 minutes
         heartbeats_initial: list[Heartbeat] = [
-            {
-                "id": f"hb-{i}",
-                "server_id": "server-1",
-                "received_at": now - timedelta(minutes=i * 5),  # Every 5 minutes
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
-            for i in range(20)  # 20 heartbeats over 100 minutes
+            make_heartbeat(now - timedelta(minutes=5) * i, idx=i) for i in range(20)
         ]
 
         uptime_initial = compute_uptime_percent(
@@ -233,19 +141,9 @@ class TestStaleServerDecay:
         assert uptime_initial > 0.0  # Should have some uptime
 
         # Later: Fewer heartbeats (server going offline)
+        # Only 5 heartbeats over 10 hours, every 2 hours
         heartbeats_later: list[Heartbeat] = [
-            {
-                "id": f"hb-{i}",
-                "server_id": "server-1",
-                "received_at": now - timedelta(hours=i * 2),  # Every 2 hours
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
-            for i in range(5)  # Only 5 heartbeats over 10 hours
+            make_heartbeat(now - timedelta(hours=2) * i, idx=i) for i in range(5)
         ]
 
         uptime_later = compute_uptime_percent(
@@ -254,33 +152,23 @@ class TestStaleServerDecay:
         assert uptime_later is not None
         assert uptime_later < uptime_initial  # Uptime decreased
 
-    def test_quality_score_decreases(self, grace_window):
+    def test_quality_score_decreases(self, grace_window, make_heartbeat):
         """Regression test: Quality score decreases."""
         now = datetime.now(timezone.utc)
 
         # Initial: High uptime, high activity, green confidence
         heartbeats_good: list[Heartbeat] = [
             {
-                "id": f"hb-{i}",
-                "server_id": "server-1",
-                "received_at": now - timedelta(minutes=i * 5),
-                "status": "online",
-                "map_name": None,
+                **make_heartbeat(now - timedelta(minutes=5) * i, idx=i),
                 "players_current": 60,
                 "players_capacity": 70,
-                "agent_version": None,
-                "key_version": None,
             }
             for i in range(10)
         ]
 
-        uptime_good = compute_uptime_percent(
+        _, _, quality_good = compute_all(
             "server-1", heartbeats_good, grace_window, window_hours=24
         )
-        confidence_good = compute_confidence("server-1", heartbeats_good, grace_window)
-        quality_good = compute_quality_score(
-            uptime_good, 60, 70, confidence_good, heartbeats_good
-        )
 
         assert quality_good is not None
         # Quality depends on uptime (which is low with sparse heartbeats), activity, and confidence
@@ -291,26 +179,16 @@ class TestStaleServerDecay:
         # Later: Lower uptime, lower activity, yellow confidence
         heartbeats_poor: list[Heartbeat] = [
             {
-                "id": f"hb-{i}",
-                "server_id": "server-1",
-                "received_at": now - timedelta(hours=i * 3),
-                "status": "online",
-                "map_name": None,
+                **make_heartbeat(now - timedelta(hours=3) * i, idx=i),
                 "players_current": 10,
                 "players_capacity": 70,
-                "agent_version": None,
-                "key_version": None,
             }
             for i in range(3)
         ]
 
-        uptime_poor = compute_uptime_percent(
+        _, _, quality_poor = compute_all(
             "server-1", heartbeats_poor, grace_window, window_hours=24
         )
-        confidence_poor = compute_confidence("server-1", heartbeats_poor, grace_window)
-        quality_poor = compute_quality_score(
-            uptime_poor, 10, 70, confidence_poor, heartbeats_poor
-        )
 
         # Quality should decrease
         if quality_poor is not None and quality_good is not None:
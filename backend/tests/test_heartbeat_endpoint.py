@@ -1,12 +1,11 @@
-import base64
 from datetime import datetime, timezone
 
+import httpx
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+import pytest_asyncio
 
-from app.main import app
-from app.core.crypto import canonicalize_heartbeat_envelope
+from app.api.v1 import heartbeat as heartbeat_api
 from app.db.heartbeat_repo import HeartbeatCreateResult, HeartbeatRepository
 from app.db.heartbeat_jobs_repo import HeartbeatJobsRepository
 from app.db.servers_derived_repo import ServersDerivedRepository
@@ -17,11 +16,20 @@ from app.db.providers import (
 )
 
 
+# (replay mode, detected replay) -> result; only a fresh id outside replay mode inserts
+_CREATE_RESULTS = {
+    (True, True): HeartbeatCreateResult(inserted=False, replay=True),
+    (True, False): HeartbeatCreateResult(inserted=False, replay=True),
+    (False, True): HeartbeatCreateResult(inserted=False, replay=True),
+    (False, False): HeartbeatCreateResult(inserted=True, replay=False),
+}
+
+
 class FakeHeartbeatRepo(HeartbeatRepository):
     def __init__(self, replay: bool = False):
         self.replay = replay
         self.calls = []
-        self.seen_heartbeat_ids = set()  # Track seen heartbeat IDs for replay detection
+        self.seen_heartbeat_ids: set[str] = set()  # Track seen heartbeat IDs for replay detection
 
     async def create_heartbeat(self, req, received_at, server_cluster_id=None):
         self.calls.append((req, received_at, server_cluster_id))
@@ -37,10 +45,7 @@ class FakeHeartbeatRepo(HeartbeatRepository):
             self.seen_heartbeat_ids.add(heartbeat_id)
 
         # If replay mode is set, always return replay=True, otherwise use actual detection
-        if self.replay:
-            return HeartbeatCreateResult(inserted=False, replay=True)
-        else:
-            return HeartbeatCreateResult(inserted=not is_replay, replay=is_replay)
+        return _CREATE_RESULTS[(self.replay, is_replay)]
 
 
 class FakeJobsRepo(HeartbeatJobsRepository):
@@ -110,51 +115,129 @@ class FakeDerivedRepo(ServersDerivedRepository):
         return False, None
 
 
-def sign_envelope(priv: Ed25519PrivateKey, envelope: dict) -> str:
-    msg = canonicalize_heartbeat_envelope(envelope)
-    sig = priv.sign(msg)
-    return base64.b64encode(sig).decode("utf-8")
+async def _post_json(client: httpx.AsyncClient, url: str, payload: dict) -> httpx.Response:
+    """POST payload encoded with orjson (datetimes serialize as RFC3339 with Z)."""
+    return await client.post(
+        url,
+        content=orjson.dumps(payload, option=orjson.OPT_UTC_Z),
+        headers={"content-type": "application/json"},
+    )
 
 
-@pytest.fixture
-def client():
-    return TestClient(app)
+def _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo) -> None:
+    """Serve the given fakes through dependency overrides for the current test."""
 
+    # async so FastAPI awaits them on the event loop (sync deps go via the threadpool)
+    async def _hb_repo():
+        return hb_repo
 
-def test_heartbeat_valid_signature_happy_path(client):
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+    async def _jobs_repo():
+        return jobs_repo
 
-    hb_repo = FakeHeartbeatRepo(replay=False)
-    jobs_repo = FakeJobsRepo()
-    derived_repo = FakeDerivedRepo(public_key_b64=pub_b64, key_version=1, grace=600)
+    async def _derived_repo():
+        return derived_repo
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo
+    override_dependency(get_heartbeat_repo, _hb_repo)
+    override_dependency(get_heartbeat_jobs_repo, _jobs_repo)
+    override_dependency(get_servers_derived_repo, _derived_repo)
 
-    now = datetime.now(timezone.utc)
-    envelope = {
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient(app_instance):
+    """Persistent in-process client; skips TestClient's thread/portal hop per request."""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app_instance), base_url="http://t"
+    ) as c:
+        yield c
+
+
+# Signed envelopes used by the happy-path tests (timestamp filled from frozen_now)
+_ENVELOPES = {
+    "hb-1": {
         "server_id": "server-1",
         "key_version": 1,
-        "timestamp": now,
         "heartbeat_id": "hb-1",
         "status": "online",
         "map_name": "TheIsland",
         "players_current": 5,
         "players_capacity": 70,
         "agent_version": "0.1.0",
-    }
-    envelope["signature"] = sign_envelope(priv, envelope)
-
-    r = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            # serialize timestamp as ISO for request payload
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    },
+    "hb-dup": {
+        "server_id": "server-1",
+        "key_version": 1,
+        "heartbeat_id": "hb-dup",
+        "status": "online",
+        "agent_version": "0.1.0",
+    },
+    "hb-duplicate": {
+        "server_id": "server-1",
+        "key_version": 1,
+        "heartbeat_id": "hb-duplicate",
+        "status": "online",
+        "map_name": "TheIsland",
+        "players_current": 70,  # High player count
+        "players_capacity": 70,
+        "agent_version": "0.1.0",
+    },
+    "hb-unique-1": {
+        "server_id": "server-1",
+        "key_version": 1,
+        "heartbeat_id": "hb-unique-1",
+        "status": "online",
+        "agent_version": "0.1.0",
+    },
+    "hb-same-id": {
+        "server_id": "server-1",
+        "key_version": 1,
+        "heartbeat_id": "hb-same-id",
+        "status": "online",
+        "agent_version": "0.1.0",
+    },
+}
+
+
+@pytest.fixture(scope="session")
+def frozen_now() -> datetime:
+    """Fixed heartbeat timestamp so signatures can be computed once per session."""
+    return datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def signed_payloads(frozen_now, sign) -> dict[str, dict]:
+    """Request payloads for _ENVELOPES, signed once per module at frozen_now."""
+    payloads = {}
+    for heartbeat_id, fields in _ENVELOPES.items():
+        envelope = {**fields, "timestamp": frozen_now}
+        payloads[heartbeat_id] = {**envelope, "signature": sign(envelope)}
+    return payloads
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch, frozen_now):
+    """Freeze the heartbeat endpoint's clock so frozen_now passes the grace-window check."""
+
+    class _FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen_now if tz is None else frozen_now.astimezone(tz)
+
+    monkeypatch.setattr(heartbeat_api, "datetime", _FrozenDatetime)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_valid_signature_happy_path(
+    aclient, ed25519_key, signed_payloads, frozen_clock, override_dependency
+):
+    _, pub_b64 = ed25519_key
+
+    hb_repo = FakeHeartbeatRepo(replay=False)
+    jobs_repo = FakeJobsRepo()
+    derived_repo = FakeDerivedRepo(public_key_b64=pub_b64, key_version=1, grace=600)
+
+    _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo)
+
+    r = await _post_json(aclient, "/api/v1/heartbeat/", signed_payloads["hb-1"])
     assert r.status_code == 200 or r.status_code == 202
     body = r.json()
     assert body["received"] is True
@@ -164,123 +247,76 @@ def test_heartbeat_valid_signature_happy_path(client):
     assert jobs_repo.enqueued == ["server-1"]
     assert len(derived_repo.fast_updates) == 1
 
-    app.dependency_overrides.clear()
-
 
-def test_heartbeat_replay_is_idempotent_and_does_not_enqueue(client):
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_replay_is_idempotent_and_does_not_enqueue(
+    aclient, ed25519_key, signed_payloads, frozen_clock, override_dependency
+):
+    _, pub_b64 = ed25519_key
 
     hb_repo = FakeHeartbeatRepo(replay=True)
     jobs_repo = FakeJobsRepo()
     derived_repo = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo
+    _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo)
 
-    now = datetime.now(timezone.utc)
-    envelope = {
-        "server_id": "server-1",
-        "key_version": 1,
-        "timestamp": now,
-        "heartbeat_id": "hb-dup",
-        "status": "online",
-        "agent_version": "0.1.0",
-    }
-    envelope["signature"] = sign_envelope(priv, envelope)
-
-    r = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r = await _post_json(aclient, "/api/v1/heartbeat/", signed_payloads["hb-dup"])
     assert r.status_code == 200 or r.status_code == 202
     body = r.json()
     assert body["replay"] is True
 
     assert jobs_repo.enqueued == []  # replay should not enqueue
-    app.dependency_overrides.clear()
 
 
-def test_heartbeat_invalid_signature_rejected(client):
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_invalid_signature_rejected(aclient, ed25519_key, override_dependency):
+    _, pub_b64 = ed25519_key
 
     hb_repo = FakeHeartbeatRepo(replay=False)
     jobs_repo = FakeJobsRepo()
     derived_repo = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo
+    _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo)
 
     now = datetime.now(timezone.utc)
     payload = {
         "server_id": "server-1",
         "key_version": 1,
-        "timestamp": now.isoformat().replace("+00:00", "Z"),
+        "timestamp": now,
         "heartbeat_id": "hb-bad",
         "status": "online",
         "agent_version": "0.1.0",
         "signature": "not-a-real-signature",
     }
 
-    r = client.post("/api/v1/heartbeat/", json=payload)
+    r = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r.status_code in (401, 403)
 
     assert len(hb_repo.calls) == 0
     assert jobs_repo.enqueued == []
-    app.dependency_overrides.clear()
 
 
-def test_heartbeat_duplicate_id_does_not_affect_ranking(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_duplicate_id_does_not_affect_ranking(
+    aclient, ed25519_key, signed_payloads, frozen_clock, override_dependency
+):
     """Regression test: Duplicate heartbeat_id doesn't affect ranking."""
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+    _, pub_b64 = ed25519_key
 
     hb_repo = FakeHeartbeatRepo(replay=False)  # Track replay state automatically
     jobs_repo = FakeJobsRepo()
     derived_repo = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo
+    _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo)
 
-    now = datetime.now(timezone.utc)
-    envelope = {
-        "server_id": "server-1",
-        "key_version": 1,
-        "timestamp": now,
-        "heartbeat_id": "hb-duplicate",
-        "status": "online",
-        "map_name": "TheIsland",
-        "players_current": 70,  # High player count
-        "players_capacity": 70,
-        "agent_version": "0.1.0",
-    }
-    envelope["signature"] = sign_envelope(priv, envelope)
+    payload = signed_payloads["hb-duplicate"]
 
     # First heartbeat (should succeed)
-    r1 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r1 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r1.status_code in (200, 202)
 
     # Second heartbeat with same ID (replay)
-    r2 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r2 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r2.status_code in (200, 202)
     body2 = r2.json()
     assert body2["replay"] is True
@@ -288,117 +324,66 @@ def test_heartbeat_duplicate_id_does_not_affect_ranking(client):
     # Replay should not enqueue job (no duplicate processing)
     assert jobs_repo.enqueued == ["server-1"]  # Only first heartbeat enqueued
 
-    app.dependency_overrides.clear()
-
 
-def test_heartbeat_replay_detection_works_correctly(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_replay_detection_works_correctly(
+    aclient, ed25519_key, signed_payloads, frozen_clock, override_dependency
+):
     """Regression test: Replay detection works correctly."""
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+    _, pub_b64 = ed25519_key
+    payload = signed_payloads["hb-unique-1"]
 
     # First call: not a replay
     hb_repo1 = FakeHeartbeatRepo(replay=False)
     jobs_repo1 = FakeJobsRepo()
     derived_repo1 = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo1
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo1
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo1
+    _use_fakes(override_dependency, hb_repo1, jobs_repo1, derived_repo1)
 
-    now = datetime.now(timezone.utc)
-    envelope = {
-        "server_id": "server-1",
-        "key_version": 1,
-        "timestamp": now,
-        "heartbeat_id": "hb-unique-1",
-        "status": "online",
-        "agent_version": "0.1.0",
-    }
-    envelope["signature"] = sign_envelope(priv, envelope)
-
-    r1 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r1 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r1.status_code in (200, 202)
     body1 = r1.json()
     assert body1["replay"] is False
     assert jobs_repo1.enqueued == ["server-1"]
 
-    app.dependency_overrides.clear()
-
     # Second call with same heartbeat_id: is a replay
     hb_repo2 = FakeHeartbeatRepo(replay=True)
     jobs_repo2 = FakeJobsRepo()
     derived_repo2 = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo2
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo2
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo2
+    _use_fakes(override_dependency, hb_repo2, jobs_repo2, derived_repo2)
 
-    r2 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r2 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r2.status_code in (200, 202)
     body2 = r2.json()
     assert body2["replay"] is True
     assert jobs_repo2.enqueued == []  # Replay should not enqueue
 
-    app.dependency_overrides.clear()
 
-
-def test_heartbeat_replay_does_not_create_duplicate_jobs(client):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_heartbeat_replay_does_not_create_duplicate_jobs(
+    aclient, ed25519_key, signed_payloads, frozen_clock, override_dependency
+):
     """Regression test: Replay doesn't create duplicate jobs."""
-    priv = Ed25519PrivateKey.generate()
-    pub_b64 = base64.b64encode(priv.public_key().public_bytes_raw()).decode("utf-8")
+    _, pub_b64 = ed25519_key
 
     hb_repo = FakeHeartbeatRepo(replay=False)
     jobs_repo = FakeJobsRepo()
     derived_repo = FakeDerivedRepo(public_key_b64=pub_b64)
 
-    app.dependency_overrides[get_heartbeat_repo] = lambda: hb_repo
-    app.dependency_overrides[get_heartbeat_jobs_repo] = lambda: jobs_repo
-    app.dependency_overrides[get_servers_derived_repo] = lambda: derived_repo
+    _use_fakes(override_dependency, hb_repo, jobs_repo, derived_repo)
 
-    now = datetime.now(timezone.utc)
-    envelope = {
-        "server_id": "server-1",
-        "key_version": 1,
-        "timestamp": now,
-        "heartbeat_id": "hb-same-id",
-        "status": "online",
-        "agent_version": "0.1.0",
-    }
-    envelope["signature"] = sign_envelope(priv, envelope)
+    payload = signed_payloads["hb-same-id"]
 
     # First call
-    r1 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r1 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r1.status_code in (200, 202)
     assert len(jobs_repo.enqueued) == 1
     assert jobs_repo.enqueued == ["server-1"]
 
     # Second call with same heartbeat_id (replay)
     hb_repo.replay = True  # Simulate replay detection
-    r2 = client.post(
-        "/api/v1/heartbeat/",
-        json={
-            **envelope,
-            "timestamp": now.isoformat().replace("+00:00", "Z"),
-        },
-    )
+    r2 = await _post_json(aclient, "/api/v1/heartbeat/", payload)
     assert r2.status_code in (200, 202)
     body2 = r2.json()
     assert body2["replay"] is True
@@ -406,5 +391,3 @@ def test_heartbeat_replay_does_not_create_duplicate_jobs(client):
     # Should still have only one job (no duplicate)
     assert len(jobs_repo.enqueued) == 1
     assert jobs_repo.enqueued == ["server-1"]
-
-    app.dependency_overrides.clear()
@@ -4,6 +4,8 @@ Tests for heartbeat worker.
 Tests worker crash recovery, job retry, and duplicate processing prevention.
 """
 
+import heapq
+import time
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -15,12 +17,36 @@ from app.db.servers_derived_repo import ServersDerivedRepository
 class FakeHeartbeatJobsRepo(HeartbeatJobsRepository):
     """Fake heartbeat jobs repository for testing."""
 
+    STALE_CLAIM_AFTER_NS = 5 * 60 * 1_000_000_000  # 5 minutes
+
     def __init__(self):
         self.jobs = []
-        self.claimed_jobs = {}  # job_id -> claimed_at
+        self.claimed_jobs = {}  # job_id -> claimed_at (time.monotonic_ns())
         self.processed_jobs = set()
         self.failed_jobs = {}  # job_id -> (error, attempts)
         self.job_id_counter = 0
+        self._by_id: dict[str, dict] = {}  # job_id -> job (O(1) lookups)
+        # Heaps of (timestamp, seq, job_id); entries are validated lazily on pop,
+        # so superseded entries (job processed, re-claimed, ...) are just skipped
+        self._pending_heap = []  # keyed on created_at (FIFO)
+        self._claimed_heap = []  # keyed on claimed_at ns (oldest claim first)
+        self._seq = 0
+
+    def _push(self, heap: list, at, job_id: str) -> None:
+        self._seq += 1
+        heapq.heappush(heap, (at, self._seq, job_id))
+
+    def backdate_claim(self, job_id: str, claimed_at: datetime) -> None:
+        """Move a job's claim time (simulates a worker that crashed long ago)."""
+        age = datetime.now(timezone.utc) - claimed_at
+        claimed_ns = time.monotonic_ns() - int(age.total_seconds() * 1_000_000_000)
+        self.claimed_jobs[job_id] = claimed_ns
+        self._by_id[job_id]["claimed_at"] = claimed_at
+        self._push(self._claimed_heap, claimed_ns, job_id)
+
+    def get_job(self, job_id: str) -> dict | None:
+        """Look up a job by id."""
+        return self._by_id.get(job_id)
 
     async def enqueue_server(self, server_id: str) -> None:
         """Enqueue a server for processing."""
@@ -36,38 +62,43 @@ class FakeHeartbeatJobsRepo(HeartbeatJobsRepository):
             "error": None,
         }
         self.jobs.append(job)
+        self._by_id[job["id"]] = job
+        self._push(self._pending_heap, job["created_at"], job["id"])
 
     async def claim_jobs(self, batch_size: int):
-        """Claim pending jobs."""
-        pending = [
-            j
-            for j in self.jobs
-            if j["status"] == "pending" and j["id"] not in self.claimed_jobs
-        ]
-
-        # Also reclaim stale claims (older than 5 minutes)
-        now = datetime.now(timezone.utc)
-        stale_threshold = now - timedelta(minutes=5)
-        stale_claimed = [
-            j
-            for j in self.jobs
-            if j["id"] in self.claimed_jobs
-            and self.claimed_jobs[j["id"]] < stale_threshold
-            and j["status"] == "claimed"
-        ]
-
-        to_claim = (pending + stale_claimed)[:batch_size]
+        """Claim pending jobs, then reclaim stale claims (older than 5 minutes)."""
+        # Integer monotonic clock for the stale check; datetimes only at the API boundary
+        now_ns = time.monotonic_ns()
+        stale_before_ns = now_ns - self.STALE_CLAIM_AFTER_NS
+        to_claim = []
+
+        while self._pending_heap and len(to_claim) < batch_size:
+            _, _, job_id = heapq.heappop(self._pending_heap)
+            job = self._by_id[job_id]
+            if job["status"] == "pending" and job_id not in self.claimed_jobs:
+                to_claim.append(job)
+
+        while self._claimed_heap and len(to_claim) < batch_size:
+            claimed_ns, _, job_id = self._claimed_heap[0]
+            if claimed_ns >= stale_before_ns:
+                break
+            heapq.heappop(self._claimed_heap)
+            job = self._by_id[job_id]
+            if job["status"] == "claimed" and self.claimed_jobs.get(job_id) == claimed_ns:
+                to_claim.append(job)
 
+        now = datetime.now(timezone.utc)
         for job in to_claim:
             job["status"] = "claimed"
             job["claimed_at"] = now
-            self.claimed_jobs[job["id"]] = now
+            self.claimed_jobs[job["id"]] = now_ns
+            self._push(self._claimed_heap, now_ns, job["id"])
 
         return to_claim
 
     async def mark_processed(self, job_id: str, processed_at: datetime) -> None:
         """Mark job as processed."""
-        job = next((j for j in self.jobs if j["id"] == job_id), None)
+        job = self._by_id.get(job_id)
         if job:
             job["status"] = "processed"
             job["processed_at"] = processed_at
@@ -77,7 +108,7 @@ class FakeHeartbeatJobsRepo(HeartbeatJobsRepository):
 
     async def mark_failed(self, job_id: str, error: str, attempts: int) -> None:
         """Mark job as failed."""
-        job = next((j for j in self.jobs if j["id"] == job_id), None)
+        job = self._by_id.get(job_id)
         if job:
             job["status"] = "pending"  # Retry
             job["attempts"] = attempts
@@ -85,6 +116,7 @@ class FakeHeartbeatJobsRepo(HeartbeatJobsRepository):
             self.failed_jobs[job_id] = (error, attempts)
             if job_id in self.claimed_jobs:
                 del self.claimed_jobs[job_id]
+            self._push(self._pending_heap, job["created_at"], job_id)
 
 
 class FakeDerivedRepoForWorker(ServersDerivedRepository):
@@ -148,8 +180,7 @@ async def test_worker_crash_mid_processing():
     # (In real implementation, this would be based on actual time)
     # For test, we'll manually mark as stale by manipulating claimed_at
     old_time = datetime.now(timezone.utc) - timedelta(minutes=6)
-    jobs_repo.claimed_jobs[claimed[0]["id"]] = old_time
-    claimed[0]["claimed_at"] = old_time
+    jobs_repo.backdate_claim(claimed[0]["id"], old_time)
 
     # Reclaim stale jobs
     reclaimed = await jobs_repo.claim_jobs(batch_size=10)
@@ -174,7 +205,7 @@ async def test_stale_claim_reclaim_works():
 
     # Make claim stale (older than 5 minutes)
     old_time = datetime.now(timezone.utc) - timedelta(minutes=6)
-    jobs_repo.claimed_jobs[job_id] = old_time
+    jobs_repo.backdate_claim(job_id, old_time)
 
     # Reclaim should pick up stale job
     reclaimed = await jobs_repo.claim_jobs(batch_size=10)
@@ -199,7 +230,7 @@ async def test_jobs_retried_after_worker_restart():
     await jobs_repo.mark_failed(job_id, "Processing error", attempts=1)
 
     # Job should be back to pending status
-    job = next((j for j in jobs_repo.jobs if j["id"] == job_id), None)
+    job = jobs_repo.get_job(job_id)
     assert job is not None
     assert job["status"] == "pending"
     assert job["attempts"] == 1
@@ -231,7 +262,7 @@ async def test_no_duplicate_processing():
     assert len(reclaimed) == 0  # Already processed
 
     # Verify job is marked as processed
-    job = next((j for j in jobs_repo.jobs if j["id"] == job_id), None)
+    job = jobs_repo.get_job(job_id)
     assert job is not None
     assert job["status"] == "processed"
     assert job_id in jobs_repo.processed_jobs
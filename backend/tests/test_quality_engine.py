@@ -4,8 +4,14 @@ Tests for quality engine.
 Tests quality score computation.
 """
 
+import pytest
+
+from app.db.servers_derived_repo import Heartbeat
 from app.engines.quality_engine import compute_quality_score
 
+# Shared empty heartbeat history (the v1 formula doesn't read it)
+_EMPTY_HB: tuple[Heartbeat, ...] = ()
+
 
 def test_compute_quality_score_no_uptime():
     """Test that no uptime data returns None."""
@@ -14,7 +20,7 @@ def test_compute_quality_score_no_uptime():
         players_current=None,
         players_capacity=None,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
     assert result is None
 
@@ -26,7 +32,7 @@ def test_compute_quality_score_high_uptime_green():
         players_current=50,
         players_capacity=70,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     assert result is not None
@@ -40,7 +46,7 @@ def test_compute_quality_score_red_confidence_penalty():
         players_current=50,
         players_capacity=70,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     result_red = compute_quality_score(
@@ -48,7 +54,7 @@ def test_compute_quality_score_red_confidence_penalty():
         players_current=50,
         players_capacity=70,
         confidence="red",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     assert result_green is not None
@@ -63,7 +69,7 @@ def test_compute_quality_score_player_activity():
         players_current=65,  # High fill rate
         players_capacity=70,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     result_low_activity = compute_quality_score(
@@ -71,7 +77,7 @@ def test_compute_quality_score_player_activity():
         players_current=5,  # Low fill rate
         players_capacity=70,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     assert result_high_activity is not None
@@ -89,7 +95,7 @@ def test_compute_quality_score_clamped_0_100():
         players_current=1000,  # Extreme
         players_capacity=70,
         confidence="green",
-        heartbeats=[],
+        heartbeats=_EMPTY_HB,
     )
 
     # Should still be clamped
@@ -97,126 +103,74 @@ def test_compute_quality_score_clamped_0_100():
         assert 0.0 <= result <= 100.0
 
 
-def test_compute_quality_score_monotonic_uptime():
-    """Test that quality decreases when uptime decreases (monotonic behavior)."""
-    result_high = compute_quality_score(
-        uptime_percent=95.0,
-        players_current=50,
-        players_capacity=70,
-        confidence="green",
-        heartbeats=[],
-    )
-
-    result_low = compute_quality_score(
-        uptime_percent=50.0,  # Lower uptime
-        players_current=50,  # Same activity
-        players_capacity=70,
-        confidence="green",  # Same confidence
-        heartbeats=[],
-    )
+def _inputs(**overrides) -> dict:
+    """compute_quality_score kwargs: 90% uptime, 50/70 players, green, no heartbeats."""
+    return {
+        "uptime_percent": 90.0,
+        "players_current": 50,
+        "players_capacity": 70,
+        "confidence": "green",
+        "heartbeats": _EMPTY_HB,
+        **overrides,
+    }
+
+
+@pytest.mark.parametrize(
+    "higher,lower",
+    [
+        # Higher uptime → higher quality
+        pytest.param(_inputs(uptime_percent=95.0), _inputs(uptime_percent=50.0), id="uptime"),
+        # Confidence degrades: green > yellow > red
+        pytest.param(_inputs(confidence="green"), _inputs(confidence="yellow"), id="green>yellow"),
+        pytest.param(_inputs(confidence="yellow"), _inputs(confidence="red"), id="yellow>red"),
+        # Higher fill rate → higher quality
+        pytest.param(_inputs(players_current=65), _inputs(players_current=5), id="activity"),
+    ],
+)
+def test_compute_quality_score_monotonic(higher, lower):
+    """Test that quality decreases when one factor degrades (monotonic behavior)."""
+    result_high = compute_quality_score(**higher)
+    result_low = compute_quality_score(**lower)
 
     assert result_high is not None
     assert result_low is not None
-    assert result_high > result_low  # Higher uptime → higher quality
+    assert result_high > result_low
 
 
-def test_compute_quality_score_monotonic_confidence():
-    """Test that quality decreases when confidence degrades (monotonic behavior)."""
-    result_green = compute_quality_score(
-        uptime_percent=90.0,
-        players_current=50,
-        players_capacity=70,
-        confidence="green",
-        heartbeats=[],
-    )
-
-    result_yellow = compute_quality_score(
-        uptime_percent=90.0,  # Same uptime
-        players_current=50,  # Same activity
-        players_capacity=70,
-        confidence="yellow",  # Lower confidence
-        heartbeats=[],
-    )
-
-    result_red = compute_quality_score(
-        uptime_percent=90.0,  # Same uptime
-        players_current=50,  # Same activity
-        players_capacity=70,
-        confidence="red",  # Lowest confidence
-        heartbeats=[],
-    )
-
-    assert result_green is not None
-    assert result_yellow is not None
-    assert result_red is not None
-    assert result_green > result_yellow > result_red  # Monotonic: green > yellow > red
-
-
-def test_compute_quality_score_monotonic_activity():
-    """Test that quality decreases when player activity decreases (monotonic behavior)."""
-    result_high_activity = compute_quality_score(
-        uptime_percent=90.0,
-        players_current=65,  # High fill rate
-        players_capacity=70,
-        confidence="green",
-        heartbeats=[],
-    )
-
-    result_low_activity = compute_quality_score(
-        uptime_percent=90.0,  # Same uptime
-        players_current=5,  # Low fill rate
-        players_capacity=70,
-        confidence="green",  # Same confidence
-        heartbeats=[],
-    )
-
-    assert result_high_activity is not None
-    assert result_low_activity is not None
-    assert (
-        result_high_activity > result_low_activity
-    )  # Higher activity → higher quality
-
-
-def test_compute_quality_score_unknown_behavior():
+@pytest.mark.parametrize(
+    "players_current,players_capacity",
+    [(50, 70), (None, None)],
+)
+def test_compute_quality_score_unknown_behavior(players_current, players_capacity):
     """Test that None is returned when uptime_percent is None (unknown behavior)."""
-    # Test various combinations - all should return None if uptime is None
-    result1 = compute_quality_score(
-        uptime_percent=None,
-        players_current=50,
-        players_capacity=70,
-        confidence="green",
-        heartbeats=[],
-    )
-    assert result1 is None
-
-    result2 = compute_quality_score(
-        uptime_percent=None,
-        players_current=None,
-        players_capacity=None,
-        confidence="green",
-        heartbeats=[],
+    result = compute_quality_score(
+        **_inputs(
+            uptime_percent=None,
+            players_current=players_current,
+            players_capacity=players_capacity,
+        )
     )
-    assert result2 is None
+    assert result is None
 
 
-def test_compute_quality_score_bounded_outputs():
-    """Test that all outputs are bounded to [0, 100] or None (property test)."""
-    # Test various input combinations
-    test_cases = [
+@pytest.mark.parametrize(
+    "uptime,players,capacity,confidence",
+    [
         (0.0, 0, 70, "red"),
         (100.0, 70, 70, "green"),
         (50.0, 35, 70, "yellow"),
         (25.0, 10, 70, "red"),
         (75.0, 50, 70, "green"),
-    ]
-
-    for uptime, players, capacity, confidence in test_cases:
-        result = compute_quality_score(
-            uptime_percent=uptime,
-            players_current=players,
-            players_capacity=capacity,
-            confidence=confidence,
-            heartbeats=[],
-        )
-        # Property: output is either None or in [0, 100]
-        assert result is None or (0.0 <= result <= 100.0)
+    ],
+)
+def test_compute_quality_score_bounded_outputs(uptime, players, capacity, confidence):
+    """Test that outputs are bounded to [0, 100] or None (property test)."""
+    result = compute_quality_score(
+        uptime_percent=uptime,
+        players_current=players,
+        players_capacity=capacity,
+        confidence=confidence,
+        heartbeats=_EMPTY_HB,
+    )
+    # Property: output is either None or in [0, 100]
+    assert result is None or (0.0 <= result <= 100.0)
@@ -7,12 +7,6 @@ Tests create, read, update, delete operations for servers.
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi.testclient import TestClient
-
-from app.main import create_app
-
-app = create_app()
-client = TestClient(app)
 
 
 @pytest.fixture
@@ -27,15 +21,27 @@ def auth_headers():
 class TestServerCRUD:
     """Test server CRUD operations."""
 
-    def test_create_server_requires_auth(self):
-        """Test that creating a server requires authentication."""
-        response = client.post(
-            "/api/v1/servers/",
-            json={"name": "Test Server", "description": "Test description"},
-        )
+    @pytest.mark.parametrize(
+        "method,path,body",
+        [
+            pytest.param(
+                "post",
+                "/api/v1/servers/",
+                {"name": "Test Server", "description": "Test description"},
+                id="create",
+            ),
+            pytest.param("get", "/api/v1/servers/", None, id="list_owner"),
+            pytest.param("put", "/api/v1/servers/test-id", {"name": "Updated Name"}, id="update"),
+            pytest.param("delete", "/api/v1/servers/test-id", None, id="delete"),
+        ],
+    )
+    def test_requires_auth(self, client, method, path, body):
+        """Test that server create/list/update/delete require authentication."""
+        response = client.request(method, path, json=body)
         assert response.status_code == 401
 
-    def test_create_server_with_auth(self, auth_headers):
+    @pytest.mark.requires_supabase
+    def test_create_server_with_auth(self, client, auth_headers):
         """Test creating a server with authentication."""
         # Note: This will fail if Supabase is not configured or RLS client fails
         # In test environment, this might need mocking
@@ -48,31 +54,15 @@ class TestServerCRUD:
         # In test environment without Supabase, this will fail
         assert response.status_code in (201, 500, 503)
 
-    def test_list_owner_servers_requires_auth(self):
-        """Test that listing owner's servers requires authentication."""
-        response = client.get("/api/v1/servers/")
-        assert response.status_code == 401
-
-    def test_list_owner_servers_with_auth(self, auth_headers):
+    @pytest.mark.requires_supabase
+    def test_list_owner_servers_with_auth(self, client, auth_headers):
         """Test listing owner's servers with authentication."""
         response = client.get("/api/v1/servers/", headers=auth_headers)
         # Expected: 200 OK or 500 if Supabase not configured
         assert response.status_code in (200, 500, 503)
 
-    def test_update_server_requires_auth(self):
-        """Test that updating a server requires authentication."""
-        response = client.put(
-            "/api/v1/servers/test-id",
-            json={"name": "Updated Name"},
-        )
-        assert response.status_code == 401
-
-    def test_delete_server_requires_auth(self):
-        """Test that deleting a server requires authentication."""
-        response = client.delete("/api/v1/servers/test-id")
-        assert response.status_code == 401
-
-    def test_create_server_validates_hosting_provider(self, auth_headers):
+    @pytest.mark.requires_supabase
+    def test_create_server_validates_hosting_provider(self, client, auth_headers):
         """Test that creating a server validates hosting_provider."""
         response = client.post(
             "/api/v1/servers/",
@@ -90,7 +80,7 @@ class TestServerCRUD:
     @patch("app.api.v1.servers.get_settings")
     @patch("app.api.v1.servers.get_servers_repo")
     def test_create_server_at_limit_returns_403(
-        self, mock_get_repo, mock_get_settings, auth_headers
+        self, mock_get_repo, mock_get_settings, client, override_dependency, auth_headers
     ):
         """Test that creating a server when at limit returns 403 and no row is created."""
         from app.core.deps import require_user
@@ -107,18 +97,14 @@ class TestServerCRUD:
         settings.MAX_SERVERS_PER_USER = 14
         mock_get_settings.return_value = settings
 
-        app = create_app()
-        app.dependency_overrides[require_user] = _fake_require_user
-        try:
-            test_client = TestClient(app)
-            response = test_client.post(
-                "/api/v1/servers/",
-                json={"name": "Test Server", "description": "Test description"},
-                headers=auth_headers,
-            )
-            assert response.status_code == 403
-            data = response.json()
-            assert data.get("error", {}).get("code") == "server_limit_reached"
-            mock_repo.create_server.assert_not_called()
-        finally:
-            app.dependency_overrides.pop(require_user, None)
+        # Session app; the override is removed again after this test
+        override_dependency(require_user, _fake_require_user)
+        response = client.post(
+            "/api/v1/servers/",
+            json={"name": "Test Server", "description": "Test description"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 403
+        data = response.json()
+        assert data.get("error", {}).get("code") == "server_limit_reached"
+        mock_repo.create_server.assert_not_called()
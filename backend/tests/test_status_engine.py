@@ -4,7 +4,7 @@ Tests for status engine.
 Tests effective_status computation from heartbeat history.
 """
 
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
 from app.db.servers_derived_repo import Heartbeat
 from app.engines.status_engine import compute_effective_status
@@ -20,93 +20,46 @@ def test_compute_effective_status_no_heartbeats():
     assert last_seen is None
 
 
-def test_compute_effective_status_recent_heartbeat():
+def test_compute_effective_status_recent_heartbeat(make_heartbeat, now):
     """Test that recent heartbeat within grace window returns online."""
-    now = datetime.now(timezone.utc)
     recent_time = now - timedelta(seconds=300)  # 5 minutes ago (within 10 min grace)
 
-    heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-1",
-            "received_at": recent_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-    ]
+    heartbeats: list[Heartbeat] = [make_heartbeat(recent_time, idx=1)]
 
     status, last_seen = compute_effective_status(
-        "server-1", heartbeats, grace_window_seconds=600
+        "server-1", heartbeats, grace_window_seconds=600, now=now
     )
 
     assert status == "online"
     assert last_seen == recent_time
 
 
-def test_compute_effective_status_stale_heartbeat():
+def test_compute_effective_status_stale_heartbeat(make_heartbeat, now):
     """Test that stale heartbeat beyond grace window returns offline."""
-    now = datetime.now(timezone.utc)
     stale_time = now - timedelta(seconds=1200)  # 20 minutes ago (beyond 10 min grace)
 
-    heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-1",
-            "received_at": stale_time,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-    ]
+    heartbeats: list[Heartbeat] = [make_heartbeat(stale_time, idx=1)]
 
     status, last_seen = compute_effective_status(
-        "server-1", heartbeats, grace_window_seconds=600
+        "server-1", heartbeats, grace_window_seconds=600, now=now
     )
 
     assert status == "offline"
     assert last_seen == stale_time
 
 
-def test_compute_effective_status_uses_most_recent():
+def test_compute_effective_status_uses_most_recent(make_heartbeat, now):
     """Test that status uses the most recent heartbeat."""
-    now = datetime.now(timezone.utc)
     recent_time = now - timedelta(seconds=300)  # 5 minutes ago
     old_time = now - timedelta(seconds=1200)  # 20 minutes ago
 
     heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-1",
-            "received_at": recent_time,  # Most recent first
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        },
-        {
-            "id": "hb-2",
-            "server_id": "server-1",
-            "received_at": old_time,
-            "status": "offline",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        },
+        make_heartbeat(recent_time, idx=1),  # Most recent first
+        make_heartbeat(old_time, status="offline", idx=2),
     ]
 
     status, last_seen = compute_effective_status(
-        "server-1", heartbeats, grace_window_seconds=600
+        "server-1", heartbeats, grace_window_seconds=600, now=now
     )
 
     # Should use most recent (recent_time, within grace)
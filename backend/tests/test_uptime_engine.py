@@ -4,9 +4,13 @@ Tests for uptime engine.
 Tests uptime percentage computation over rolling window.
 """
 
-from datetime import datetime, timedelta, timezone
+import random
+from datetime import timedelta
+
+import pytest
 
 from app.db.servers_derived_repo import Heartbeat
+from app.engines import uptime_engine
 from app.engines.uptime_engine import compute_uptime_percent
 
 
@@ -18,130 +22,71 @@ def test_compute_uptime_percent_no_heartbeats():
     assert result is None
 
 
-def test_compute_uptime_percent_all_online():
+def test_compute_uptime_percent_all_online(make_heartbeat, now):
     """Test uptime with consistent heartbeats (should be high)."""
-    now = datetime.now(timezone.utc)
     window_start = now - timedelta(hours=24)
 
-    # Create heartbeats every 5 minutes within window
-    heartbeats: list[Heartbeat] = []
-    current_time = window_start
-    while current_time <= now:
-        heartbeats.append(
-            {
-                "id": f"hb-{current_time.isoformat()}",
-                "server_id": "server-1",
-                "received_at": current_time,
-                "status": "online",
-                "map_name": None,
-                "players_current": None,
-                "players_capacity": None,
-                "agent_version": None,
-                "key_version": None,
-            }
-        )
-        current_time += timedelta(minutes=5)
+    # Create heartbeats every 5 minutes within window (window_start through now)
+    step = timedelta(minutes=5)
+    heartbeats: list[Heartbeat] = [
+        make_heartbeat(window_start + step * i, idx=i) for i in range((24 * 60) // 5 + 1)
+    ]
 
     # Should have high uptime (heartbeats cover most of window)
     result = compute_uptime_percent(
-        "server-1", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-1", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     assert result is not None
     assert result > 80.0  # Should be high with regular heartbeats
 
 
-def test_compute_uptime_percent_all_offline():
+def test_compute_uptime_percent_all_offline(make_heartbeat, now):
     """Test uptime with no recent heartbeats (should be low/zero)."""
-    now = datetime.now(timezone.utc)
     old_time = now - timedelta(hours=25)  # Outside 24h window
 
-    heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-1",
-            "received_at": old_time,
-            "status": "offline",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
-    ]
+    heartbeats: list[Heartbeat] = [make_heartbeat(old_time, status="offline", idx=1)]
 
     result = compute_uptime_percent(
-        "server-1", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-1", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     # Should be None or very low (heartbeat outside window)
     assert result is None or result < 10.0
 
 
-def test_compute_uptime_percent_interval_merging():
+def test_compute_uptime_percent_interval_merging(make_heartbeat, now):
     """Test that overlapping intervals are merged correctly."""
-    now = datetime.now(timezone.utc)
     base_time = now - timedelta(hours=1)
 
     # Create overlapping heartbeats (each covers 600s grace window)
+    step = timedelta(minutes=5)
     heartbeats: list[Heartbeat] = [
-        {
-            "id": f"hb-{i}",
-            "server_id": "server-1",
-            "received_at": base_time + timedelta(seconds=i * 300),  # Every 5 minutes
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
+        make_heartbeat(base_time + step * i, idx=i)  # Every 5 minutes
         for i in range(10)  # 10 heartbeats over 50 minutes
     ]
 
     result = compute_uptime_percent(
-        "server-1", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-1", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     assert result is not None
     assert 0.0 <= result <= 100.0
 
 
-def test_compute_uptime_percent_long_offline_gap():
+def test_compute_uptime_percent_long_offline_gap(make_heartbeat, now):
     """Regression test: Server offline for days, then comes back."""
-    now = datetime.now(timezone.utc)
-
     # Server was online 3 days ago, then offline, now back online
     old_online = now - timedelta(days=3)
     recent_online = now - timedelta(minutes=5)
 
     heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-recent",
-            "server_id": "server-1",
-            "received_at": recent_online,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        },
-        {
-            "id": "hb-old",
-            "server_id": "server-1",
-            "received_at": old_online,
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        },
+        make_heartbeat(recent_online, idx="recent"),
+        make_heartbeat(old_online, idx="old"),
     ]
 
     result = compute_uptime_percent(
-        "server-1", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-1", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     # Should have low uptime (only recent heartbeat in 24h window)
@@ -150,37 +95,19 @@ def test_compute_uptime_percent_long_offline_gap():
     assert result < 50.0  # Should be low (only one heartbeat in window)
 
 
-def test_compute_uptime_percent_flapping_servers():
+def test_compute_uptime_percent_flapping_servers(make_heartbeat, now):
     """Regression test: Server rapidly goes online/offline (flapping)."""
-    now = datetime.now(timezone.utc)
     window_start = now - timedelta(hours=2)
 
     # Create flapping pattern: online for 5 min, offline for 5 min, repeat
-    heartbeats: list[Heartbeat] = []
-    current_time = window_start
-    online = True
-
-    while current_time <= now:
-        if online:
-            heartbeats.append(
-                {
-                    "id": f"hb-{current_time.isoformat()}",
-                    "server_id": "server-1",
-                    "received_at": current_time,
-                    "status": "online",
-                    "map_name": None,
-                    "players_current": None,
-                    "players_capacity": None,
-                    "agent_version": None,
-                    "key_version": None,
-                }
-            )
-        # Toggle every 5 minutes
-        current_time += timedelta(minutes=5)
-        online = not online
+    # (a heartbeat at the start of every online slot, window_start through now)
+    cycle = timedelta(minutes=10)
+    heartbeats: list[Heartbeat] = [
+        make_heartbeat(window_start + cycle * i, idx=i) for i in range((2 * 60) // 10 + 1)
+    ]
 
     result = compute_uptime_percent(
-        "server-1", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-1", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     # Should have moderate uptime (about 50% if flapping pattern)
@@ -191,29 +118,59 @@ def test_compute_uptime_percent_flapping_servers():
     assert result > 0.0  # Should have some uptime (at least some heartbeats in window)
 
 
-def test_compute_uptime_percent_cold_start_server():
+def test_compute_uptime_percent_cold_start_server(make_heartbeat, now):
     """Regression test: New server with no history (cold-start)."""
-    now = datetime.now(timezone.utc)
-
     # New server with single recent heartbeat
     heartbeats: list[Heartbeat] = [
-        {
-            "id": "hb-1",
-            "server_id": "server-new",
-            "received_at": now - timedelta(minutes=2),
-            "status": "online",
-            "map_name": None,
-            "players_current": None,
-            "players_capacity": None,
-            "agent_version": None,
-            "key_version": None,
-        }
+        make_heartbeat(now - timedelta(minutes=2), server_id="server-new", idx=1)
     ]
 
     result = compute_uptime_percent(
-        "server-new", heartbeats, grace_window_seconds=600, window_hours=24
+        "server-new", heartbeats, grace_window_seconds=600, window_hours=24, now=now
     )
 
     # Should have very low uptime (single heartbeat in 24h window)
     assert result is not None
     assert result < 10.0  # Single heartbeat covers ~600s out of 86400s = ~0.7%
+
+
+@pytest.mark.parametrize(
+    ("age_s", "expected_covered_s"),
+    [
+        (120.0, 120.0),  # Interval clamped at window end
+        (3_600.0, 600.0),  # Full grace window
+        (86_300.0, 600.0),  # Starts 100s after window start
+        (86_400.0, 600.0),  # Starts exactly at window start
+        (86_401.0, None),  # Outside window
+    ],
+)
+def test_uptime_from_ages_single_heartbeat(age_s, expected_covered_s):
+    """Single heartbeat fast path keeps the merge path's window and clamping."""
+    result = uptime_engine.uptime_from_ages([age_s], 600)
+
+    if expected_covered_s is None:
+        assert result is None
+    else:
+        assert result == pytest.approx(expected_covered_s / 86_400.0 * 100.0)
+
+
+@pytest.mark.parametrize("grace", [60, 600, 3600])
+def test_uptime_from_ages_dense_history_is_exact(monkeypatch, grace):
+    """Bucket reduction of dense histories leaves uptime unchanged (vs the unreduced merge)."""
+    rng = random.Random(grace)
+
+    # Bursts of every-few-seconds heartbeats, gaps, and ages outside the window
+    ages_s = [rng.uniform(-300, 90_000) for _ in range(2_000)]
+    for _ in range(20):
+        burst = rng.uniform(0, 86_400)
+        ages_s += [burst + 7.5 * i for i in range(rng.randint(1, 400))]
+    rng.shuffle(ages_s)  # Any order
+
+    assert len(uptime_engine._bucket_extreme_ages(ages_s, grace, 86_400.0)) < len(ages_s)
+    result = uptime_engine.uptime_from_ages(ages_s, grace)
+
+    # Same merge over every heartbeat
+    monkeypatch.setattr(uptime_engine, "_bucket_extreme_ages", lambda ages, *_: ages)
+    expected = uptime_engine.uptime_from_ages(ages_s, grace)
+
+    assert result == pytest.approx(expected, abs=1e-9)